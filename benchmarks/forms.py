@@ -0,0 +1,82 @@
+""" Compiled form pipeline vs calling every field: time to convert a list
+    of rows with values_to_python and values_from_python.
+
+    python benchmarks/forms.py [rows] [fields]
+"""
+import sys
+import timeit
+from datetime import date
+
+from ikcms.forms import Form
+from ikcms.forms import fields
+from ikcms.forms import exceptions
+
+
+def make_form(fields_count):
+    field_classes = [fields.String, fields.Int, fields.Date]
+    form_fields = []
+    for num in range(fields_count):
+        field_cls = field_classes[num % len(field_classes)]
+        form_fields.append(type('field{}'.format(num), (field_cls,), {
+            'name': 'field{}'.format(num),
+            'required': num % 2 == 0,
+        }))
+    return type('BenchmarkForm', (Form,), {'fields': form_fields})()
+
+
+def make_rows(form, rows_count):
+    rows = []
+    for row in range(rows_count):
+        python_row = {}
+        for num, field in enumerate(form.values()):
+            if isinstance(field, fields.Int):
+                python_row[field.name] = row * num
+            elif isinstance(field, fields.Date):
+                python_row[field.name] = date(2000 + num, 1, 1 + row % 28)
+            else:
+                python_row[field.name] = 'value {} {}'.format(row, num)
+        rows.append(python_row)
+    return rows
+
+
+def walk_to_python(form, raw_dict):
+    python_dict = {}
+    errors = {}
+    for field in form.values():
+        try:
+            python_dict.update(field.to_python(raw_dict))
+        except exceptions.ValidationError as exc:
+            errors.update(exc.kwargs['error'])
+    return python_dict, errors
+
+
+def walk_from_python(form, python_dict):
+    raw_dict = {}
+    for field in form.values():
+        raw_dict.update(field.from_python(python_dict))
+    return raw_dict
+
+
+def main(rows_count=1000, fields_count=30, number=20):
+    form = make_form(fields_count)
+    python_rows = make_rows(form, rows_count)
+    raw_rows = [walk_from_python(form, row) for row in python_rows]
+    print('{} rows x {} fields'.format(rows_count, fields_count))
+    cases = [
+        ('from_python', 'walk',
+         lambda: [walk_from_python(form, row) for row in python_rows]),
+        ('from_python', 'pipeline',
+         lambda: form.values_from_python(python_rows)),
+        ('to_python', 'walk',
+         lambda: [walk_to_python(form, row) for row in raw_rows]),
+        ('to_python', 'pipeline',
+         lambda: form.values_to_python(raw_rows)),
+    ]
+    for method, name, func in cases:
+        run_time = min(timeit.repeat(func, number=1, repeat=number))
+        print('{:>11} {:>8}: {:6.2f} ms'.format(
+            method, name, run_time * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
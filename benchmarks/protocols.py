@@ -0,0 +1,80 @@
+""" Json vs MsgPack on stream list responses: encode and decode time and
+    payload size.
+
+    python benchmarks/protocols.py [items] [fields]
+"""
+import sys
+import timeit
+
+from ikcms.ws_apps.base import protocols
+from ikcms.ws_apps.base import messages
+
+
+def make_response(items_count, fields_count):
+    names = ['id'] + ['field{}'.format(i) for i in range(1, fields_count)]
+    items = []
+    for n in range(items_count):
+        item = {}
+        for num, name in enumerate(names):
+            if num % 3 == 0:
+                item[name] = n * num
+            elif num % 3 == 1:
+                item[name] = 'Item {} field {} title text'.format(n, num)
+            else:
+                item[name] = '2017-0{}-{:02}'.format(num % 9 + 1, n % 28 + 1)
+        items.append(item)
+    fields_cfg = [{'widget': 'Widget', 'name': name, 'label': name.title(),
+                   'fields': []} for name in names]
+    # the body of streams.actions.List response
+    body = {
+        'stream': 'docs',
+        'title': 'Documents',
+        'action': 'list',
+        'list_fields': fields_cfg,
+        'items': items,
+        'total': 100000,
+        'total_kind': 'exact',
+        'filters_fields': fields_cfg[:5],
+        'filters_errors': {},
+        'filters': {},
+        'page_size': items_count,
+        'page': 1,
+        'order': '+id',
+        'after': None,
+        'before': None,
+        'prev_cursor': 'WzFd',
+        'next_cursor': 'WzEwMF0',
+    }
+    return messages.Response(
+        name='response',
+        request_id='request_id',
+        handler='streams.action',
+        body=body,
+    )
+
+
+def main(items_count=100, fields_count=30, number=200):
+    response = make_response(items_count, fields_count)
+    codecs = [protocols.Json()]
+    if protocols.msgpack is not None:
+        codecs.append(protocols.MsgPack())
+    else:
+        print('msgpack is not installed')
+    print('{} items x {} fields'.format(items_count, fields_count))
+    for protocol in codecs:
+        raw = protocol.encode_response(response)
+        encode_time = timeit.timeit(
+            lambda: protocol.encode_response(response), number=number)
+        decode_time = timeit.timeit(
+            lambda: protocol.decode(raw), number=number)
+        print('{:>8}: {:8.1f} KiB, encode {:6.2f} ms, decode {:6.2f} ms'
+              .format(
+                  protocol.name,
+                  len(raw) / 1024,
+                  encode_time / number * 1000,
+                  decode_time / number * 1000,
+              ))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,86 @@
+""" Rows as dicts vs records: memory held by a loaded list and time to
+    build it and render it with a list form. Records build their dicts in
+    the form, one at a time, so compare the total.
+
+    python benchmarks/records.py [rows] [columns]
+"""
+import sys
+import timeit
+import tracemalloc
+from collections.abc import Mapping
+
+from ikcms.forms import Form
+from ikcms.forms import fields
+from ikcms.utils.records import record_class
+
+
+class Row(Mapping):
+    """ Mapping over a tuple, like result rows of the db driver """
+
+    def __init__(self, keymap, values):
+        self._keymap = keymap
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._keymap[key]]
+
+    def __iter__(self):
+        return iter(self._keymap)
+
+    def __len__(self):
+        return len(self._values)
+
+
+def make_rows(rows_count, columns_count):
+    keys = ['id'] + ['column{}'.format(i) for i in range(1, columns_count)]
+    keymap = {key: i for i, key in enumerate(keys)}
+    return keys, [Row(keymap, tuple(n if key == 'id' else \
+                                    '{}-{}'.format(key, n) for key in keys))
+                  for n in range(rows_count)]
+
+
+def make_form(keys):
+    form_fields = [type(key, (fields.Field,), {'name': key}) for key in keys]
+    return type('ListForm', (Form,), {'fields': form_fields})()
+
+
+def load_dicts(keys, rows):
+    return [dict(row) for row in rows]
+
+
+def load_records(keys, rows):
+    record_cls = record_class('BenchRecord', tuple(keys))
+    return [record_cls(*[row[key] for key in keys]) for row in rows]
+
+
+def measure_memory(load, keys, rows):
+    tracemalloc.start()
+    items = load(keys, rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return size
+
+
+def main(rows_count=1000, columns_count=30, number=20):
+    keys, rows = make_rows(rows_count, columns_count)
+    form = make_form(keys)
+    print('{} rows x {} columns'.format(rows_count, columns_count))
+    for name, load in [('dict', load_dicts), ('record', load_records)]:
+        memory = measure_memory(load, keys, rows)
+        load_time = timeit.timeit(lambda: load(keys, rows), number=number)
+        items = load(keys, rows)
+        form_time = timeit.timeit(
+            lambda: form.values_from_python(items), number=number)
+        print('{:>6}: {:8.1f} KiB, load {:6.2f} ms, form {:6.2f} ms, '
+              'total {:6.2f} ms'.format(
+                  name,
+                  memory / 1024,
+                  load_time / number * 1000,
+                  form_time / number * 1000,
+                  (load_time + form_time) / number * 1000,
+              ))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -1,21 +1,96 @@
+import os
+import signal
+import asyncio
+import logging
 from code import interact
+from urllib.parse import urlsplit
+
 from ikcms.ws_servers.websockets import WS_Server
 from .base import Cli
 
+logger = logging.getLogger(__name__)
+
 
 class WsAppCli(Cli):
 
     name = 'app'
     server_class = WS_Server
 
-    def command_serve(self, level=None, cfg=''):
+    def command_serve(self, level=None, cfg='', workers=None):
         kwargs = dict(custom_cfg_path=cfg)
         if level:
             kwargs['LOG_LEVEL'] = level
-        app = self.create_app(**kwargs)
-        server = self.server_class(app.cfg.WS_SERVER_URL, app)
+        cfg = self.create_cfg(**kwargs)
+        workers = int(workers or getattr(cfg, 'WS_WORKERS', 1))
+        # components check it, locks must be shared by workers
+        cfg.update(dict(WS_WORKERS=workers))
+        if workers > 1:
+            self.serve_workers(cfg, workers)
+        else:
+            self.serve(cfg)
+
+    def serve(self, cfg, worker_id=None):
+        # the app is created in the worker, db pools and other connections
+        # made by components can not be shared between processes
+        if worker_id is not None:
+            cfg.update(dict(WS_WORKER_ID=worker_id))
+        app = self.App(cfg)
+        url = urlsplit(cfg.WS_SERVER)
+        server = self.server_class(
+            url.hostname,
+            url.port,
+            app,
+            reuse_port=worker_id is not None,
+            worker_id=worker_id,
+            metrics_interval=getattr(cfg, 'WS_METRICS_INTERVAL', None),
+            send_queue_size=getattr(cfg, 'WS_SEND_QUEUE_SIZE', None),
+            slow_client_policy=getattr(cfg, 'WS_SLOW_CLIENT_POLICY', None),
+        )
         server.serve_forever()
 
+    def serve_workers(self, cfg, workers):
+        """ Forks workers listening on the same port with SO_REUSEPORT, the
+            kernel spreads connections between them """
+        pids = {}
+        for worker_id in range(workers):
+            pid = self.fork_worker(cfg, worker_id)
+            pids[pid] = worker_id
+
+        def stop(signum, frame):
+            for pid in list(pids):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    # exited and reaped, the others still have to stop
+                    pids.pop(pid, None)
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        while pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            worker_id = pids.pop(pid, None)
+            logger.info('Worker %s (pid %s) exited with status %s',
+                        worker_id, pid, status)
+
+    def fork_worker(self, cfg, worker_id):
+        pid = os.fork()
+        if pid:
+            return pid
+        status = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            self.serve(cfg, worker_id)
+        except BaseException:
+            logger.exception('Worker %s failed', worker_id)
+            status = 1
+        finally:
+            os._exit(status)
+
     def command_shell(self, level=None, cfg=''):
         kwargs = dict(custom_cfg_path=cfg)
         if level:
@@ -29,4 +104,3 @@ class WsAppCli(Cli):
         return {
             'app': app,
         }
-
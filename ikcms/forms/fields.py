@@ -69,6 +69,23 @@ class Base:
     def get_initials(self, **kwargs):
         return None
 
+    # Form runs these ops instead of to_python/from_python:
+    # to_op(raw_dict, python_dict, errors), from_op(python_dict, raw_dict)
+    def compile_to_python(self):
+        to_python = self.to_python
+        def to_op(raw_dict, python_dict, errors):
+            try:
+                python_dict.update(to_python(raw_dict))
+            except exceptions.ValidationError as exc:
+                errors.update(exc.kwargs['error'])
+        return to_op
+
+    def compile_from_python(self):
+        from_python = self.from_python
+        def from_op(python_dict, raw_dict):
+            raw_dict.update(from_python(python_dict))
+        return from_op
+
 
 
 class Field(Base):
@@ -89,6 +106,44 @@ class Field(Base):
         raw_value = super().from_python(python_value)
         return {self.name: raw_value}
 
+    def compile_to_python(self):
+        cls = self.__class__
+        if cls.to_python is not Field.to_python or \
+                cls._raw_value_notset is not Base._raw_value_notset:
+            return super().compile_to_python()
+        # same steps as to_python without intermediate dicts
+        name = self.name
+        conv_to_python = self.conv.to_python
+        validators = tuple(self.validators)
+        raw_value_notset = self._raw_value_notset
+        def to_op(raw_dict, python_dict, errors):
+            raw_value = raw_dict.get(name, NOTSET)
+            try:
+                if raw_value is NOTSET:
+                    python_value = raw_value_notset()
+                else:
+                    python_value = conv_to_python(raw_value)
+                for validator in validators:
+                    python_value = validator(python_value)
+            except exceptions.ValidationError as exc:
+                errors[name] = exc.kwargs['error']
+            else:
+                if python_value is not NOTSET:
+                    python_dict[name] = python_value
+        return to_op
+
+    def compile_from_python(self):
+        if self.__class__.from_python is not Field.from_python:
+            return super().compile_from_python()
+        name = self.name
+        conv_from_python = self.conv.from_python
+        def from_op(python_dict, raw_dict):
+            python_value = python_dict.get(name, NOTSET)
+            if python_value is NOTSET:
+                raise exceptions.PythonValueRequiredError(name)
+            raw_dict[name] = conv_from_python(python_value)
+        return from_op
+
 
 class String(Field):
     conv = convs.Str
@@ -1,6 +1,8 @@
 from collections import OrderedDict
+from copy import deepcopy
+
+from ikcms.utils.records import Record
 
-from . import exceptions
 from . import convs
 
 
@@ -11,11 +13,23 @@ class Form(OrderedDict):
     def __init__(self, **context):
         super().__init__()
         context.setdefault('form', self)
+        self.context = context
+        # shared with bound copies
+        self.cache = {}
         self.conv = convs.RawDict(self)
         for field in self.fields:
             assert field.name
             self[field.name] = field(context)
 
+    def bind(self, **context):
+        """ Shallow copy sharing the field tree of this form, the fields
+            keep the context they were built with """
+        form = self.__class__.__new__(self.__class__)
+        OrderedDict.__init__(form, self)
+        form.__dict__.update(self.__dict__)
+        form.context = dict(self.context, **context)
+        return form
+
     def list(self, keys=None):
         if keys is not None:
             assert not set(keys) - set(self)
@@ -23,22 +37,56 @@ class Form(OrderedDict):
         else:
             return self.items()
 
+    @property
+    def pipeline(self):
+        """ (name, to_op, from_op) of every field, compiled once per form """
+        pipeline = self.cache.get('pipeline')
+        if pipeline is None:
+            pipeline = self.cache['pipeline'] = tuple(
+                (name, field.compile_to_python(), field.compile_from_python())
+                for name, field in self.items()
+            )
+        return pipeline
+
+    def to_ops(self, keys=None):
+        if keys is None:
+            to_ops = self.cache.get('to_ops')
+            if to_ops is None:
+                to_ops = self.cache['to_ops'] = \
+                    tuple(ops[1] for ops in self.pipeline)
+            return to_ops
+        return [ops[1] for ops in self._pipeline(keys)]
+
+    def from_ops(self, keys=None):
+        if keys is None:
+            from_ops = self.cache.get('from_ops')
+            if from_ops is None:
+                from_ops = self.cache['from_ops'] = \
+                    tuple(ops[2] for ops in self.pipeline)
+            return from_ops
+        return [ops[2] for ops in self._pipeline(keys)]
+
+    def _pipeline(self, keys):
+        assert not set(keys) - set(self)
+        return [ops for ops in self.pipeline if ops[0] in keys]
+
     def to_python(self, raw_values, keys=None):
         raw_dict = self.conv.to_python(raw_values)
         python_dict = {}
         errors = {}
-        for name, field in self.list(keys):
-            try:
-                python_dict.update(field.to_python(raw_dict))
-            except exceptions.ValidationError as exc:
-                errors.update(exc.kwargs['error'])
+        for to_op in self.to_ops(keys):
+            to_op(raw_dict, python_dict, errors)
         return python_dict, errors
 
     def from_python(self, python_values, keys=None):
-        python_dict = self.conv.to_python(python_values)
+        if isinstance(python_values, Record):
+            # one dict built in C is faster than Record.get for every field
+            python_dict = python_values.to_dict()
+        else:
+            python_dict = self.conv.to_python(python_values)
         raw_dict = {}
-        for name, field in self.list(keys):
-            raw_dict.update(field.from_python(python_dict))
+        for from_op in self.from_ops(keys):
+            from_op(python_dict, raw_dict)
         return raw_dict
 
     def values_to_python(self, raw_values):
@@ -48,7 +96,12 @@ class Form(OrderedDict):
         return [self.from_python(value) for value in values]
 
     def get_cfg(self):
-        return [f.widget.to_dict(f) for f in self.values()]
+        cfg = self.cache.get('cfg')
+        if cfg is None:
+            cfg = self.cache['cfg'] = \
+                [f.widget.to_dict(f) for f in self.values()]
+        # the cache is shared by bound copies, callers may change the result
+        return deepcopy(cfg)
 
     def get_initials(self, **kwargs):
         values = {}
@@ -1,4 +1,7 @@
 from .session import Session
 from . import mappers
 from . import relations
+from . import loader
+from . import replicas
+from . import instrumentation
 from . import exc
@@ -1,4 +1,5 @@
 from sqlalchemy.exc import IntegrityError
+from ikcms.utils.keyset import CursorError
 
 class OrmError(Exception):
     pass
@@ -9,3 +10,17 @@ class ItemNotFoundError(OrmError):
 class ItemAlreadyExistsError(OrmError):
     pass
 
+class CommitError(OrmError):
+
+    def __init__(self, committed, errors):
+        super().__init__(committed, errors)
+        self.committed = committed
+        self.errors = errors
+
+
+MYSQL_DUP_ENTRY = 1062
+
+def is_duplicate_error(e):
+    orig = getattr(e, 'orig', None)
+    return bool(orig is not None and orig.args and \
+                orig.args[0] == MYSQL_DUP_ENTRY)
@@ -0,0 +1,51 @@
+__all__ = (
+    'IdentityMap',
+)
+
+
+class IdentityMap(dict):
+
+    def __init__(self):
+        super().__init__()
+        self.mappers = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_items(self, mapper, ids, keys):
+        keys = set(keys).union({'id'})
+        items = {}
+        for item_id in ids:
+            row = self.get((mapper.id, item_id))
+            if row is not None and keys.issubset(row):
+                items[item_id] = self._copy(row, keys)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return items
+
+    def add_items(self, mapper, items):
+        self.mappers[mapper.id] = mapper
+        for item in items:
+            key = (mapper.id, item['id'])
+            row = self.get(key, {})
+            row.update(self._copy(item))
+            self[key] = row
+
+    def discard_items(self, mapper, ids):
+        for item_id in ids:
+            self.pop((mapper.id, item_id), None)
+
+    def discard_related(self, mapper):
+        # links to the deleted item are removed by foreign key cascade
+        for mapper_id, related_mapper in list(self.mappers.items()):
+            for relation in related_mapper.relations.values():
+                if relation.mapper2 is mapper:
+                    for key in [key for key in self if key[0] == mapper_id]:
+                        del self[key]
+                    break
+
+    def _copy(self, item, keys=None):
+        if keys is None:
+            keys = item.keys()
+        return {key: list(item[key]) if isinstance(item[key], list) \
+                else item[key] for key in keys}
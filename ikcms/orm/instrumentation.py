@@ -0,0 +1,141 @@
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+__all__ = (
+    'QueryRecord',
+    'Instrumentation',
+    'SessionStats',
+    'RequestStats',
+    'request_stats',
+    'set_action',
+)
+
+logger = logging.getLogger(__name__)
+
+_request_stats = ContextVar('request_stats', default=None)
+
+
+class QueryRecord:
+
+    __slots__ = (
+        'kind',
+        'table',
+        'sql',
+        'compile_time',
+        'execute_time',
+        'rows',
+        'action',
+    )
+
+    def __init__(self, kind, table, sql, compile_time, execute_time, rows,
+                 action=None):
+        self.kind = kind
+        self.table = table
+        self.sql = sql
+        self.compile_time = compile_time
+        self.execute_time = execute_time
+        self.rows = rows
+        self.action = action
+
+
+class Instrumentation:
+
+    def __init__(self, slow_query_time=1.0, repeat_limit=20, hooks=None):
+        self.slow_query_time = slow_query_time
+        self.repeat_limit = repeat_limit
+        self.hooks = list(hooks or [])
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def create_stats(self):
+        return SessionStats(self)
+
+
+class SessionStats:
+
+    def __init__(self, instrumentation):
+        self.instrumentation = instrumentation
+        self.records = []
+        self.shapes = Counter()
+        self.request = _request_stats.get()
+        if self.request is not None:
+            self.request.sessions.append(self)
+
+    @property
+    def action(self):
+        return self.request and self.request.action or None
+
+    def add(self, kind, table, sql, compile_time, execute_time, rows):
+        record = QueryRecord(kind, table, sql, compile_time, execute_time,
+                             rows, action=self.action)
+        self.records.append(record)
+        instrumentation = self.instrumentation
+        slow_query_time = instrumentation.slow_query_time
+        if slow_query_time is not None and \
+                compile_time + execute_time > slow_query_time:
+            logger.warning(
+                'Slow query %.3fs (action=%s): %s',
+                compile_time + execute_time, record.action, sql,
+            )
+        self.shapes[sql] += 1
+        repeat_limit = instrumentation.repeat_limit
+        if repeat_limit is not None and self.shapes[sql] == repeat_limit + 1:
+            logger.warning(
+                'Statement executed more than %d times in one session, '
+                'possible N+1 (action=%s): %s',
+                repeat_limit, record.action, sql,
+            )
+        for hook in instrumentation.hooks:
+            hook(record)
+        return record
+
+    def totals(self):
+        return _totals(self.records)
+
+
+class RequestStats:
+
+    def __init__(self, action=None):
+        self.action = action
+        self.sessions = []
+
+    @property
+    def records(self):
+        return [record for stats in self.sessions for record in stats.records]
+
+    def totals(self):
+        return _totals(self.records)
+
+
+@contextmanager
+def request_stats(action=None):
+    stats = RequestStats(action)
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def set_action(action):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.action = action
+
+
+def _totals(records):
+    totals = {
+        'queries': len(records),
+        'compile_time': 0,
+        'execute_time': 0,
+        'rows': 0,
+    }
+    for record in records:
+        totals['compile_time'] += record.compile_time
+        totals['execute_time'] += record.execute_time
+        totals['rows'] += max(record.rows or 0, 0)
+    return totals
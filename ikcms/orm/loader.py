@@ -0,0 +1,85 @@
+import asyncio
+
+
+__all__ = (
+    'Loader',
+    'DbLoader',
+)
+
+
+class Batch:
+
+    def __init__(self, query, keys):
+        self.query = query
+        self.keys = keys
+        self.ids = set()
+        self.future = asyncio.get_event_loop().create_future()
+
+
+class Loader:
+    """ Coalesces id lookups issued within one event loop tick into one
+        select per mapper """
+
+    def __init__(self, session):
+        self.session = session
+        self.batches = {}
+
+    async def load(self, query, ids, keys=None):
+        ids = list(ids)
+        if not ids:
+            return {}
+        keys = keys and frozenset(keys) or None
+        batch_key = (query.mapper.id, keys, self._query_key(query))
+        batch = self.batches.get(batch_key)
+        if batch is None:
+            batch = self.batches[batch_key] = Batch(query, keys)
+            asyncio.get_event_loop().call_soon(self._dispatch, batch_key)
+        batch.ids.update(ids)
+        items_by_id = await asyncio.shield(batch.future)
+        return {id: self._copy(items_by_id[id]) \
+                for id in ids if id in items_by_id}
+
+    def _query_key(self, query):
+        # equal filters (state and lang of i18n and publication mappers)
+        # are built anew by every caller, they are compared compiled
+        if query._limit is not None or query._offset is not None:
+            return query
+        if query._whereclause is None:
+            return None
+        compiled = query._whereclause.compile()
+        params = sorted((name, repr(value)) \
+                        for name, value in compiled.params.items())
+        return (str(compiled), tuple(params))
+
+    def _dispatch(self, batch_key):
+        batch = self.batches.pop(batch_key)
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        try:
+            items = await self.select_items(
+                batch.query, list(batch.ids), batch.keys)
+        except Exception as e:
+            batch.future.set_exception(e)
+        else:
+            batch.future.set_result({item['id']: item for item in items})
+
+    async def select_items(self, query, ids, keys):
+        return await query.id(*ids).select_items(self.session, keys=keys)
+
+    def _copy(self, item):
+        return {key: list(value) if isinstance(value, list) else value \
+                for key, value in item.items()}
+
+
+class DbLoader(Loader):
+    """ Loader shared by all sessions of the db component, every batch runs
+        in its own session """
+
+    def __init__(self, db):
+        self.db = db
+        self.batches = {}
+
+    async def select_items(self, query, ids, keys):
+        async with await self.db(readonly=True) as session:
+            return await query.id(*ids).select_items(session, keys=keys)
@@ -1,7 +1,12 @@
 import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
 from iktomi.utils import cached_property
 
-from .query import Query, PubQuery
+from ikcms.utils import records
+from ikcms.utils.records import NOTSET
+
+from .query import Query, PubQuery, Explain
+from .statements import StatementCache
 from . import exc
 from . import relations
 
@@ -70,6 +75,7 @@ class Core:
 
     name = None
     query_class = Query
+    insert_chunk_size = 500
 
     def __init__(self, registry, db_id):
         assert self.name
@@ -92,6 +98,10 @@ class Core:
     def relations(self):
         return self.create_relations()
 
+    @cached_property
+    def statements(self):
+        return StatementCache()
+
     def get_mapper(self, **kwargs):
         db_id = kwargs.get('db_id', self.db_id)
         name = kwargs.get('name', self.name)
@@ -149,17 +159,68 @@ class Core:
         relation_keys = keys.intersection(self.relation_keys)
         return table_keys, relation_keys
 
-    async def select_items(self, session, query, keys=None):
+    async def select_items(self, session, query, keys=None, records=False,
+                           use_identity_map=True):
+        identity_map = session.identity_map if use_identity_map else None
+        table_keys, relation_keys = self.div_keys(keys)
+        if not relation_keys:
+            # table columns only, load them with the query itself. The query
+            # returns the rows the map could serve, so the map is not read
+            # here, only filled for later loads by ids
+            items = await self._select_table_items(
+                session, query, table_keys, records=records)
+            if identity_map is not None:
+                identity_map.add_items(self, items)
+            return items
         ids = await self._select_ids(session, query)
         if ids:
-            return await self._load_items(session, ids, keys)
+            return await self._load_items(
+                session, ids, keys, records=records,
+                use_identity_map=use_identity_map)
         else:
             return []
 
-    async def select_first_item(self, session, query, keys=None):
-        items = await self.select_items(session, query.limit(1), keys)
+    async def select_items_with_total(self, session, query, keys=None,
+                                      records=False):
+        """ Selects items and the number of rows matched by the query
+            without limit and offset in one statement, the total is None
+            when the page is empty. Requires window functions support
+            (MySQL 8.0+) """
+        table_keys, relation_keys = self.div_keys(keys)
+        if relation_keys:
+            table_keys = set()
+        table_keys.add('id')
+        columns = [self.c[key] for key in table_keys]
+        columns.append(sa.func.count().over().label('total_'))
+        rows = list(await session.execute(query.with_only_columns(columns)))
+        total = rows[0]['total_'] if rows else None
+        if relation_keys:
+            ids = [row[self.c['id']] for row in rows]
+            items = ids and await self._load_items(
+                session, ids, keys, records=records) or []
+            return items, total
+        if records:
+            items = self._make_records(rows, table_keys)
+        else:
+            items = [{key: row[key] for key in table_keys} for row in rows]
+        if session.identity_map is not None:
+            session.identity_map.add_items(self, items)
+        return items, total
+
+    async def select_first_item(self, session, query, keys=None,
+                                records=False):
+        items = await self.select_items(
+            session, query.limit(1), keys, records=records)
         return items and items[0] or None
 
+    def record_class(self, keys):
+        """ __slots__ record class for the given set of item keys """
+        keys = set(keys).union({'id'})
+        return records.record_class(
+            '{}Record'.format(self.name),
+            ('id',) + tuple(sorted(keys - {'id'})),
+        )
+
     async def insert_item(self, session, values, keys=None):
         keys = keys or list(values.keys())
         assert set(keys).issubset(self.allowed_keys), \
@@ -168,50 +229,152 @@ class Core:
         table_keys, relation_keys = self.div_keys(keys)
         table_values = {key: values[key] for key in table_keys}
         relation_values = {key: values[key] for key in relation_keys}
-
-        # set defaults, aio engine don't do it
-        for key, column in self.table.c.items():
-            if key not in table_values and column.default is not None:
-                if column.default.is_callable:
-                    table_values[key] = column.default.arg(self)
-                else:
-                    table_values[key] = column.default.arg
-        query = sa.sql.insert(self.table).values(table_values)
-        result = await session.execute(query)
+        self._set_defaults(table_values)
+        statement = self.statements.get_statement(
+            ('insert', frozenset(table_values)),
+            lambda: sa.sql.insert(self.table),
+            column_keys=list(table_values),
+        )
+        try:
+            result = await session.execute(statement, table_values)
+        except exc.IntegrityError as e:
+            if values.get('id') is not None and exc.is_duplicate_error(e):
+                raise exc.ItemAlreadyExistsError(values['id'])
+            raise
         item = dict(values)
         if values.get('id') is None:
             item['id'] = result.lastrowid
-        # store relations
+        if session.identity_map is not None:
+            session.identity_map.discard_items(self, [item['id']])
+        # store relations, new item has no links yet
+        for key in relation_keys:
+            await self.relations[key].insert(
+                session, [(item['id'], values[key])])
+        return item
+
+    async def insert_items(self, session, values_list, keys=None):
+        ids = []
+        for start in range(0, len(values_list), self.insert_chunk_size):
+            chunk = values_list[start:start + self.insert_chunk_size]
+            ids += await self._insert_chunk(session, chunk, keys)
+        return ids
+
+    async def upsert_item(self, session, values, keys=None, update_keys=None):
+        keys = keys or list(values.keys())
+        assert set(keys).issubset(self.allowed_keys), \
+            'Keys {} not allowed. Allowed keys={}'.format(
+                set(keys).difference(self.allowed_keys), self.allowed_keys)
+        table_keys, relation_keys = self.div_keys(keys)
+        if update_keys is None:
+            update_keys = table_keys.difference({'id'})
+        else:
+            update_keys = table_keys.intersection(update_keys) \
+                .difference({'id'})
+        table_values = {key: values[key] for key in table_keys}
+        self._set_defaults(table_values)
+        statement = self.statements.get_statement(
+            ('upsert', frozenset(table_values), frozenset(update_keys)),
+            lambda: self._upsert_query(update_keys),
+            column_keys=list(table_values),
+        )
+        result = await session.execute(statement, table_values)
+        # LAST_INSERT_ID(id) makes lastrowid valid for updated rows too
+        item = dict(values, id=result.lastrowid)
+        if session.identity_map is not None:
+            session.identity_map.discard_items(self, [item['id']])
         for key in relation_keys:
             await self.relations[key].store(session, item['id'], values[key])
         return item
 
+    def _upsert_query(self, update_keys):
+        query = mysql.insert(self.table)
+        update_values = {key: query.inserted[key] for key in update_keys}
+        update_values['id'] = sa.func.last_insert_id(self.c['id'])
+        return query.on_duplicate_key_update(**update_values)
+
     async def update_item(self, session, query, item_id, values, keys=None):
-        await self._exists_check(session, query, item_id)
-        return await self.update_item_by_id(session, item_id, values, keys)
+        return await self.update_item_by_id(
+            session, item_id, values, keys, query=query)
 
-    async def update_item_by_id(self, session, item_id, values, keys=None):
+    async def update_item_by_id(self, session, item_id, values, keys=None,
+                                query=None):
         keys = keys or list(values.keys())
         table_keys, relation_keys = self.div_keys(keys)
         table_values = {key: values[key] for key in table_keys}
         relation_values = {key: values[key] for key in relation_keys}
-        query = sa.sql.update(self.table).values(**table_values)
-        query = query.where(self.c['id'] == item_id)
-        result = await session.execute(query)
+        if table_values:
+            # query conditions are checked by the UPDATE itself,
+            # no matched rows means not found
+            if query is None or query._whereclause is None:
+                statement = self.statements.get_statement(
+                    ('update', frozenset(table_values)),
+                    lambda: sa.sql.update(self.table).where(
+                        self.c['id'] == sa.bindparam('_item_id')),
+                    column_keys=list(table_values),
+                )
+                result = await session.execute(
+                    statement, dict(table_values, _item_id=item_id))
+            else:
+                result = await session.execute(
+                    sa.sql.update(self.table).values(table_values) \
+                        .where(self.c['id'] == item_id) \
+                        .where(query._whereclause))
+            if query is not None and not result.rowcount:
+                raise exc.ItemNotFoundError(item_id)
+        elif query is not None:
+            await self._exists_check(session, query, item_id, for_update=True)
+        if session.identity_map is not None:
+            session.identity_map.discard_items(
+                self, [item_id, values.get('id', item_id)])
         item_id = values.get('id', item_id)
         for key, value in relation_values.items():
             await self.relations[key].store(session, item_id, value)
         return dict(values, id=item_id)
 
+    async def update_items_by_ids(self, session, values_list, keys=None):
+        if not values_list:
+            return
+        keys = keys or list(values_list[0].keys())
+        table_keys, relation_keys = self.div_keys(keys)
+        table_keys.discard('id')
+        for start in range(0, len(values_list), self.insert_chunk_size):
+            chunk = values_list[start:start + self.insert_chunk_size]
+            if table_keys:
+                await session.execute(
+                    self._update_chunk_query(chunk, table_keys))
+            for key in relation_keys:
+                await self.relations[key].replace_items(
+                    session, [(values['id'], values[key]) for values in chunk])
+        if session.identity_map is not None:
+            session.identity_map.discard_items(
+                self, [values['id'] for values in values_list])
+
+    def _update_chunk_query(self, values_list, keys):
+        ids = [values['id'] for values in values_list]
+        columns = {}
+        for key in keys:
+            whens = {values['id']: sa.literal(values[key], self.c[key].type) \
+                     for values in values_list}
+            columns[key] = sa.case(whens, value=self.c['id'])
+        return sa.sql.update(self.table).values(columns) \
+            .where(self.c['id'].in_(ids))
+
     async def delete_item(self, session, query, item_id):
-        await self._exists_check(session, query, item_id)
+        await self._exists_check(session, query, item_id, for_update=True)
         await self.delete_item_by_id(session, item_id)
 
     async def delete_item_by_id(self, session, item_id):
-        query = sa.sql.delete(self.table).where(self.c['id'] == item_id)
+        statement = self.statements.get_statement(
+            ('delete',),
+            lambda: sa.sql.delete(self.table).where(
+                self.c['id'] == sa.bindparam('_item_id')),
+        )
         for key in self.relation_keys:
             await self.relations[key].delete(session, item_id)
-        await session.execute(query)
+        await session.execute(statement, {'_item_id': item_id})
+        if session.identity_map is not None:
+            session.identity_map.discard_items(self, [item_id])
+            session.identity_map.discard_related(self)
 
     async def count_items(self, session, query):
         query = query.with_only_columns([sa.func.count(self.c['id'])])
@@ -219,31 +382,168 @@ class Core:
         row = await result.fetchone()
         return row[0]
 
+    async def estimate_count_items(self, session, query):
+        """ Row count estimated by the optimizer (EXPLAIN), cheap on
+            huge tables but may be far from the exact count """
+        query = query.with_only_columns([self.c['id']])
+        rows = list(await session.execute(Explain(query)))
+        if not rows or rows[0]['rows'] is None:
+            return 0
+        filtered = rows[0]['filtered']
+        filtered = 100 if filtered is None else filtered
+        return int(rows[0]['rows'] * filtered / 100)
+
     async def _select_ids(self, session, query):
         rows = list(await session.execute(query))
         return [row[self.c['id']] for row in rows]
 
-    async def _load_items(self, session, ids, keys=None):
+    async def _select_table_items(self, session, query, table_keys,
+                                  records=False):
+        table_keys = table_keys.union({'id'})
+        query = query.with_only_columns([self.c[key] for key in table_keys])
+        rows = await session.execute(query)
+        if records:
+            return self._make_records(rows, table_keys)
+        return [dict(row) for row in rows]
+
+    def _make_records(self, rows, keys):
+        record_class = self.record_class(keys)
+        fields = record_class._fields
+        return [record_class(*[row[key] for key in fields]) for row in rows]
+
+    async def _load_items(self, session, ids, keys=None, records=False,
+                          use_identity_map=True):
         table_keys, relation_keys = self.div_keys(keys)
         table_keys.add('id')
-        query = sa.sql.select([self.c[key] for key in table_keys])
-        if len(ids) == 1:
-            query = query.where(self.c['id'] == ids[0])
-        else:
-            query = query.where(self.c['id'].in_(ids))
-        rows = list(await session.execute(query))
-        items = [dict(row) for row in rows]
-        item_by_id = {item['id']: item for item in items}
-        sorted_items = [item_by_id[id] for id in ids]\
-        # load relations
-        for key in relation_keys:
-            result = await self.relations[key].load(session, item_by_id.keys())
+        identity_map = session.identity_map if use_identity_map else None
+        cached_items = {}
+        if identity_map is not None:
+            cached_items = identity_map.get_items(
+                self, ids, table_keys.union(relation_keys))
+        load_ids = [id for id in ids if id not in cached_items]
+        item_by_id = {}
+        if load_ids:
+            statement = self.statements.get_statement(
+                ('load', frozenset(table_keys)),
+                lambda: sa.sql.select(
+                    [self.c[key] for key in table_keys]).where(
+                    self.c['id'].in_(sa.bindparam('ids', expanding=True))),
+            )
+            rows = await session.execute(statement, {'ids': load_ids})
+            if records:
+                record_class = self.record_class(
+                    table_keys.union(relation_keys))
+                # relation fields stay unset until _load_relations
+                fields = [key if key in table_keys else None \
+                          for key in record_class._fields]
+                items = [record_class(*[NOTSET if key is None else row[key] \
+                                        for key in fields]) \
+                         for row in rows]
+            else:
+                items = [dict(row) for row in rows]
+            item_by_id = {item['id']: item for item in items}
+            await self._load_relations(session, item_by_id, relation_keys)
+            if identity_map is not None:
+                identity_map.add_items(self, items)
+        if records and cached_items:
+            record_class = self.record_class(table_keys.union(relation_keys))
+            cached_items = {id: record_class.from_mapping(item) \
+                            for id, item in cached_items.items()}
+        item_by_id.update(cached_items)
+        return [item_by_id[id] for id in ids]
+
+    async def _load_relations(self, session, item_by_id, keys):
+        union_keys = sorted(key for key in keys \
+                            if hasattr(self.relations[key], 'union_query'))
+        if len(union_keys) < 2:
+            union_keys = []
+        for key in set(keys).difference(union_keys):
+            result = await self.relations[key].load(
+                session, item_by_id.keys())
             for id, value in result.items():
                 item_by_id[id][key] = value
-        return sorted_items
+        if not union_keys:
+            return
+        # one round trip for all relations, rows of each relation come
+        # in table order, ordered relations are sorted by position
+        statement = self.statements.get_statement(
+            ('load_relations', tuple(union_keys)),
+            lambda: sa.union_all(*[
+                self.relations[key].union_query(
+                    key, sa.bindparam('ids', expanding=True)) \
+                for key in union_keys]),
+        )
+        rows = await session.execute(statement, {'ids': list(item_by_id)})
+        result = {}
+        for row in rows:
+            result.setdefault((row['relation'], row['local_id']), []) \
+                .append((row['position'], row['remote_id']))
+        for (key, id), values in result.items():
+            if self.relations[key].ordered:
+                values.sort(key=lambda value: value[0])
+            item_by_id[id][key] = [remote_id for _, remote_id in values]
+
+    @cached_property
+    def column_defaults(self):
+        return [(key, column.default) for key, column in self.table.c.items()
+                if column.default is not None]
+
+    def _set_defaults(self, table_values):
+        # set defaults, aio engine don't do it
+        for key, default in self.column_defaults:
+            if key not in table_values:
+                if default.is_callable:
+                    table_values[key] = default.arg(self)
+                else:
+                    table_values[key] = default.arg
 
-    async def _exists_check(self, session, query, item_id):
-        ids = await self._select_ids(session, query.filter_by(id=item_id))
+    async def _insert_chunk(self, session, values_list, keys=None):
+        keys = keys or list(values_list[0].keys())
+        assert set(keys).issubset(self.allowed_keys), \
+            'Keys {} not allowed. Allowed keys={}'.format(
+                set(keys).difference(self.allowed_keys), self.allowed_keys)
+        table_keys, relation_keys = self.div_keys(keys)
+        ids = [values.get('id') for values in values_list]
+        rows_with_id = []
+        rows_without_id = []
+        for values in values_list:
+            table_values = {key: values[key] for key in table_keys}
+            self._set_defaults(table_values)
+            if values.get('id') is None:
+                table_values.pop('id', None)
+                rows_without_id.append(table_values)
+            else:
+                # supplied ids are inserted even if keys do not list id
+                table_values['id'] = values['id']
+                rows_with_id.append(table_values)
+        if rows_with_id:
+            query = sa.sql.insert(self.table).values(rows_with_id)
+            await session.execute(query)
+        if rows_without_id:
+            query = sa.sql.insert(self.table).values(rows_without_id)
+            result = await session.execute(query)
+            # MySQL returns the first id of a multi-row insert, the rest are
+            # consecutive (innodb_autoinc_lock_mode 0 or 1)
+            new_ids = iter(range(
+                result.lastrowid,
+                result.lastrowid + len(rows_without_id),
+            ))
+            ids = [next(new_ids) if id is None else id for id in ids]
+        # store relations
+        for key in relation_keys:
+            relation_values = [(id, values[key]) \
+                               for id, values in zip(ids, values_list)]
+            await self.relations[key].insert(session, relation_values)
+        if session.identity_map is not None:
+            session.identity_map.discard_items(self, ids)
+        return ids
+
+    async def _exists_check(self, session, query, item_id, for_update=False):
+        query = query.filter_by(id=item_id)
+        if for_update:
+            # checks before writes run on the primary, in the transaction
+            query = query.with_for_update()
+        ids = await self._select_ids(session, query)
         if len(ids) == 0:
             raise exc.ItemNotFoundError(item_id)
         if len(ids) > 1:
@@ -282,7 +582,35 @@ class Core:
                 create_schema=False,
             )
 
-    async def fill(self, session, query, data, str_path):
+    async def fill(self, session, query, data, *str_paths, loader=None):
+        targets = [self._fill_target(data, str_path) \
+                   for str_path in str_paths]
+        ids = set()
+        for data, key in targets:
+            if key is None:
+                for items_list in data:
+                    ids.update(items_list)
+            else:
+                ids.update(items_dict[key] for items_dict in data)
+        if loader is not None:
+            items_by_id = await loader.load(query, ids)
+        elif ids:
+            items = await query.id(*ids).select_items(session)
+            items_by_id = {item['id']: item for item in items}
+        else:
+            items_by_id = {}
+        for data, key in targets:
+            if key is None:
+                for items_list in data:
+                    items = [items_by_id[x] for x in items_list]
+                    items_list.clear()
+                    items_list.extend(items)
+            else:
+                for items_dict in data:
+                    items_dict[key] = items_by_id[items_dict[key]]
+
+    def _fill_target(self, data, str_path):
+        # returns (lists of ids, None) or (dicts, key of id)
         paths = str_path.split('.')
         if isinstance(data, dict):
             data = [data]
@@ -302,9 +630,9 @@ class Core:
 
         tp = self._get_list_type(data)
         if tp == list:
-            await self._fill_lists(session, query, data)
+            return data, None
         else:
-            await self._fill_dicts(session, query, prev_data, path)
+            return prev_data, path
 
     def _get_list_type(self, items_list):
         data = [item for item in items_list if item]
@@ -313,26 +641,6 @@ class Core:
             raise TypeError(tps)
         return tps.pop()
 
-    async def _fill_lists(self, session, query, data):
-        ids = set()
-        for items_list in data:
-            ids.update(items_list)
-        items = await query.id(ids).select_items(session)
-        items_by_id = {item['id']: item for item in items}
-        for items_list in data:
-            items = [items_by_id[x] for x in items_list]
-            items_list.clear()
-            items_list.extend(items)
-
-    async def _fill_dicts(self, session, query, data, key):
-        ids = set()
-        for items_dict in data:
-            ids.add(items_dict[key])
-        items = await query.id(ids).select_items(session)
-        items_by_id = {id: item for item in items}
-        for items_dict in data:
-            items_dict[key] = items_by_id[items_dict[key]]
-
 
 class I18nMixin:
 
@@ -426,18 +734,72 @@ class I18nMixin:
             values['id'] = results[lang]['id']
         return results[self.lang]
 
-    async def update_item_by_id(self, session, item_id, values, keys=None):
+    async def insert_items(self, session, values_list, keys=None):
+        values_list = [dict(values, id=values.get('id')) \
+                       for values in values_list]
+        for lang in self.langs:
+            mapper = self.i18n_mappers[lang]
+            if lang == self.lang:
+                lang_values_list = [dict(values) for values in values_list]
+                for lang_values in lang_values_list:
+                    self.set_normal_state(lang_values)
+                lang_keys = keys
+            else:
+                lang_values_list = [dict(values) for values in values_list]
+                for lang_values in lang_values_list:
+                    self.set_absent_state(lang_values)
+                if keys is None:
+                    common_keys = set(self.common_keys)
+                else:
+                    common_keys = set(self.common_keys).intersection(keys)
+                lang_keys = common_keys.union({'id', 'state'})
+            insert_items = mapper.i18n_base_insert_items
+            ids = await insert_items(session, lang_values_list, lang_keys)
+            for values, id in zip(values_list, ids):
+                values['id'] = id
+        return ids
+
+    async def upsert_item(self, session, values, keys=None, update_keys=None):
+        results = {}
+        values = dict(values)
+        if update_keys is None:
+            update_keys = set(keys or values).difference({'id', 'state'})
+        for lang in self.langs:
+            mapper = self.i18n_mappers[lang]
+            lang_values = dict(values)
+            if lang == self.lang:
+                self.set_normal_state(lang_values)
+                lang_keys = keys
+                lang_update_keys = update_keys
+            else:
+                self.set_absent_state(lang_values)
+                if keys is None:
+                    common_keys = set(self.common_keys)
+                else:
+                    common_keys = set(self.common_keys).intersection(keys)
+                lang_keys = common_keys.union({'id', 'state'})
+                lang_update_keys = common_keys
+            upsert_item = mapper.i18n_base_upsert_item
+            results[lang] = await upsert_item(
+                session, lang_values, lang_keys, lang_update_keys)
+            values['id'] = results[lang]['id']
+        return results[self.lang]
+
+    async def update_item_by_id(self, session, item_id, values, keys=None,
+                                query=None):
         assert 'id' not in values or values['id'] == item_id,\
             'Changing item_id not permitted'
         if keys is None:
             common_keys = set(self.common_keys)
         else:
             common_keys = set(self.common_keys).intersection(keys)
-        for lang in self.langs:
+        # current language goes first, it checks the query conditions
+        for lang in sorted(self.langs, key=lambda lang: lang != self.lang):
             mapper = self.i18n_mappers[lang]
             update_item = mapper.i18n_base_update_item_by_id
             if lang == self.lang:
-                result = await update_item(session, item_id, values, keys)
+                result = await update_item(
+                    session, item_id, values, keys, query=query)
             elif common_keys:
                 await update_item(
                     session,
@@ -447,6 +809,19 @@ class I18nMixin:
                 )
         return result
 
+    async def update_items_by_ids(self, session, values_list, keys=None):
+        if not values_list:
+            return
+        keys = keys or list(values_list[0].keys())
+        common_keys = set(self.common_keys).intersection(keys)
+        for lang in self.langs:
+            mapper = self.i18n_mappers[lang]
+            update_items = mapper.i18n_base_update_items_by_ids
+            if lang == self.lang:
+                await update_items(session, values_list, keys)
+            elif common_keys:
+                await update_items(session, values_list, common_keys)
+
     async def delete_item_by_id(self, session, item_id):
         for lang in self.langs[::-1]:
             mapper = self.i18n_mappers[lang]
@@ -468,9 +843,21 @@ class I18nMixin:
     async def i18n_base_insert_item(self, session, values, keys=None):
         return await super().insert_item(session, values, keys)
 
+    async def i18n_base_insert_items(self, session, values_list, keys=None):
+        return await super().insert_items(session, values_list, keys)
+
+    async def i18n_base_upsert_item(self, session, values, keys=None,
+                                    update_keys=None):
+        return await super().upsert_item(session, values, keys, update_keys)
+
     async def i18n_base_update_item_by_id(self, session, item_id, values,
-                                          keys=None):
-        return await super().update_item_by_id(session, item_id, values, keys)
+                                          keys=None, query=None):
+        return await super().update_item_by_id(
+            session, item_id, values, keys, query=query)
+
+    async def i18n_base_update_items_by_ids(self, session, values_list,
+                                            keys=None):
+        return await super().update_items_by_ids(session, values_list, keys)
 
     async def i18n_base_delete_item_by_id(self, session, item_id):
         return await super().delete_item_by_id(session, item_id)
@@ -554,6 +941,36 @@ class PublicationMixin:
         await insert_item(session, values, keys={'id', 'state'})
         return item
 
+    async def insert_items(self, session, values_list, keys=None):
+        assert self.db_id == self.db_ids[0], \
+            'Insert denied for "{}" mapper'.format(self.db_id)
+        values_list = [dict(values) for values in values_list]
+        for values in values_list:
+            self.set_private_state(values)
+        insert_items = self.pub_base_insert_items
+        ids = await insert_items(session, values_list, keys=keys)
+        values_list = [{'id': id} for id in ids]
+        for values in values_list:
+            self.set_private_state(values)
+        insert_items = self.pub_mappers[1].pub_base_insert_items
+        await insert_items(session, values_list, keys={'id', 'state'})
+        return ids
+
+    async def upsert_item(self, session, values, keys=None, update_keys=None):
+        assert self.db_id == self.db_ids[0], \
+            'Upsert denied for "{}" mapper'.format(self.db_id)
+        values = dict(values)
+        if update_keys is None:
+            update_keys = set(keys or values).difference({'id', 'state'})
+        self.set_private_state(values)
+        upsert_item = self.pub_base_upsert_item
+        item = await upsert_item(session, values, keys, update_keys)
+        values = {'id': item['id']}
+        self.set_private_state(values)
+        upsert_item = self.pub_mappers[1].pub_base_upsert_item
+        await upsert_item(session, values, {'id', 'state'}, set())
+        return item
+
     async def delete_item(self, session, query, item_id):
         assert self.db_id == self.db_ids[0], \
             'Delete denied for "{}" mapper'.format(self.db_id)
@@ -570,7 +987,7 @@ class PublicationMixin:
         assert self.db_id == self.db_ids[0], \
             'Publish denied for "{}" mapper'.format(self.db_id)
         assert self.db_id == self.db_ids[0]
-        await self._exists_check(session, query, item_id)
+        await self._exists_check(session, query, item_id, for_update=True)
         admin_mapper = self.pub_mappers[0]
         items = await admin_mapper.select_items(session, query.id(item_id))
         admin_item = items[0]
@@ -586,6 +1003,46 @@ class PublicationMixin:
             values,
         )
 
+    async def publish_items(self, session, query, ids):
+        assert self.db_id == self.db_ids[0], \
+            'Publish denied for "{}" mapper'.format(self.db_id)
+        if not ids:
+            return []
+        admin_mapper, front_mapper = self.pub_mappers
+        # locking read goes to the primary, the rows are copied as they are
+        query = query.filter_by(state=self.STATE_PRIVATE).with_for_update()
+        items = await admin_mapper.select_items(session, query.id(*ids))
+        ids = [item['id'] for item in items]
+        await admin_mapper._set_items_state(
+            session, ids, self.STATE_PUBLIC)
+        for item in items:
+            self.set_public_state(item)
+        await front_mapper.update_items_by_ids(session, items)
+        return ids
+
+    async def unpublish_items(self, session, query, ids):
+        assert self.db_id == self.db_ids[0], \
+            'Unpublish denied for "{}" mapper'.format(self.db_id)
+        if not ids:
+            return []
+        query = query.filter_by(state=self.STATE_PUBLIC).with_for_update()
+        ids = await self._select_ids(session, query.id(*ids))
+        for mapper in self.pub_mappers:
+            await mapper._set_items_state(session, ids, self.STATE_PRIVATE)
+        return ids
+
+    async def _set_items_state(self, session, ids, state):
+        if not ids:
+            return
+        statement = self.statements.get_statement(
+            ('set_state', state),
+            lambda: sa.sql.update(self.table).values(state=state).where(
+                self.c['id'].in_(sa.bindparam('ids', expanding=True))),
+        )
+        await session.execute(statement, {'ids': list(ids)})
+        if session.identity_map is not None:
+            session.identity_map.discard_items(self, ids)
+
     def set_private_state(self, values):
         values['state'] = self.STATE_PRIVATE
 
@@ -595,6 +1052,13 @@ class PublicationMixin:
     async def pub_base_insert_item(self, session, values, keys=None):
         return await super().insert_item(session, values, keys)
 
+    async def pub_base_insert_items(self, session, values_list, keys=None):
+        return await super().insert_items(session, values_list, keys)
+
+    async def pub_base_upsert_item(self, session, values, keys=None,
+                                   update_keys=None):
+        return await super().upsert_item(session, values, keys, update_keys)
+
     async def pub_base_delete_item(self, session, query, item_id):
         return await super().delete_item(session, query, item_id)
 
@@ -1,7 +1,13 @@
 import sqlalchemy as sa
+from sqlalchemy.ext.compiler import compiles
+
+from ikcms.utils import keyset
+
 
 class Query(sa.sql.Select):
 
+    _keyset_reversed = False
+
     def __init__(self, mapper, *args, **kwargs):
         self.mapper = self.m = mapper
         super().__init__([self.mapper.c['id']], *args, **kwargs)
@@ -18,19 +24,85 @@ class Query(sa.sql.Select):
             q = q.where(self.mapper.c[key] == value)
         return q
 
-    async def select_items(self, session, keys=None):
-        return await self.mapper.select_items(
+    def order_keys(self):
+        return keyset.order_keys(
+            self._order_by_clause.clauses,
+            self.mapper.c['id'],
+        )
+
+    def cursor(self, item):
+        return keyset.encode_cursor(
+            [item[column.key] for column, desc in self.order_keys()])
+
+    def after(self, cursor):
+        return self._seek(cursor, reverse=False)
+
+    def before(self, cursor):
+        return self._seek(cursor, reverse=True)
+
+    def _seek(self, cursor, reverse):
+        keys = self.order_keys()
+        values = keyset.decode_cursor(cursor, len(keys))
+        query = self.where(keyset.seek_clause(keys, values, reverse=reverse))
+        query = query.order_by(None).order_by(
+            *keyset.order_clauses(keys, reverse=reverse))
+        query._keyset_reversed = reverse
+        return query
+
+    async def select_items(self, session, keys=None, records=False):
+        items = await self.mapper.select_items(
             session,
             self,
             keys=keys,
+            records=records,
         )
+        if self._keyset_reversed:
+            items.reverse()
+        return items
 
-    async def select_first_item(self, session, keys=None):
-        return await self.mapper.select_first_item(
+    async def select_items_with_total(self, session, keys=None,
+                                      records=False):
+        items, total = await self.mapper.select_items_with_total(
             session,
             self,
             keys=keys,
+            records=records,
         )
+        if self._keyset_reversed:
+            items.reverse()
+        return items, total
+
+    async def iter_items(self, session, keys=None, chunk_size=1000):
+        assert self._limit is None and self._offset is None, \
+            'iter_items does not support limit and offset'
+        # every chunk is ordered with the tie breaker, cursors continue it
+        query = self.order_by(None).order_by(
+            *keyset.order_clauses(self.order_keys()))
+        load_keys = keys
+        if keys is not None:
+            load_keys = set(keys).union(
+                [column.key for column, desc in query.order_keys()])
+        chunk_query = query.limit(chunk_size)
+        while True:
+            # the identity map would keep every item of the table alive
+            items = await self.mapper.select_items(
+                session, chunk_query, keys=load_keys, use_identity_map=False)
+            if not items:
+                break
+            cursor = query.cursor(items[-1])
+            for item in items:
+                if load_keys is not keys:
+                    item = {key: item[key] for key in item \
+                            if key == 'id' or key in keys}
+                yield item
+            if len(items) < chunk_size:
+                break
+            chunk_query = query.after(cursor).limit(chunk_size)
+
+    async def select_first_item(self, session, keys=None, records=False):
+        items = await self.limit(1).select_items(
+            session, keys=keys, records=records)
+        return items and items[0] or None
 
     async def insert_item(self, session, values, keys=None): #XXX
         return await self.mapper.insert_item(
@@ -39,6 +111,21 @@ class Query(sa.sql.Select):
             keys=keys,
         )
 
+    async def insert_items(self, session, values_list, keys=None):
+        return await self.mapper.insert_items(
+            session,
+            values_list=values_list,
+            keys=keys,
+        )
+
+    async def upsert_item(self, session, values, keys=None, update_keys=None):
+        return await self.mapper.upsert_item(
+            session,
+            values=values,
+            keys=keys,
+            update_keys=update_keys,
+        )
+
     async def update_item(self, session, item_id, values, keys=None):
         return await self.mapper.update_item(
             session,
@@ -61,12 +148,19 @@ class Query(sa.sql.Select):
             self,
         )
 
-    async def fill(self, session, data, path):
+    async def estimate_count_items(self, session):
+        return await self.mapper.estimate_count_items(
+            session,
+            self,
+        )
+
+    async def fill(self, session, data, *paths, loader=None):
         return await self.mapper.fill(
             session,
             self,
             data,
-            path,
+            *paths,
+            loader=loader
         )
 
 
@@ -76,4 +170,21 @@ class PubQuery(Query):
     async def publish(self, session, item_id):
         return await self.mapper.publish(session, self, item_id)
 
+    async def publish_items(self, session, ids):
+        return await self.mapper.publish_items(session, self, ids)
+
+    async def unpublish_items(self, session, ids):
+        return await self.mapper.unpublish_items(session, self, ids)
+
+
+class Explain(sa.sql.expression.Executable, sa.sql.ClauseElement):
+
+    __visit_name__ = 'explain'
+
+    def __init__(self, query):
+        self.query = query
+
 
+@compiles(Explain)
+def _compile_explain(element, compiler, **kwargs):
+    return 'EXPLAIN ' + compiler.process(element.query, **kwargs)
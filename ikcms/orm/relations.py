@@ -80,18 +80,71 @@ class M2M:
         return self.table.c[self.order_field_name]
 
     async def load(self, session, item_ids):
+        statement = self.mapper1.statements.get_statement(
+            ('m2m_select', self.tablename),
+            lambda: self.select_query(
+                sa.bindparam('item_ids', expanding=True)),
+        )
+        params = {'item_ids': list(item_ids)}
         result = {}
-        for row in await session.execute(self.select_query(item_ids)):
+        for row in await session.execute(statement, params):
             result.setdefault(row[self.local_field], []) \
                 .append(row[self.remote_field])
         return result
 
-    async def store(self, session, item_id, value):
+    async def store(self, session, item_id, value, replace=False):
+        value = list(value)
+        if replace or len(set(value)) != len(value):
+            return await self.replace(session, item_id, value)
+        current = await self.load_rows(session, item_id)
+        if len(dict(current)) != len(current):
+            return await self.replace(session, item_id, value)
+        current = dict(current)
+        new = {rel_id: self.ordered and (num+1) or None \
+               for num, rel_id in enumerate(value)}
+        delete_ids = [rel_id for rel_id in current if rel_id not in new]
+        if delete_ids:
+            await session.execute(self.delete_query(item_id, delete_ids))
+        rows = [self.row_values(item_id, rel_id, order=order) \
+                for rel_id, order in new.items() if rel_id not in current]
+        if rows:
+            await session.execute(sa.sql.insert(self.table).values(rows))
+        if self.ordered:
+            orders = {rel_id: order for rel_id, order in new.items() \
+                      if rel_id in current and current[rel_id] != order}
+            if orders:
+                await session.execute(self.reorder_query(item_id, orders))
+
+    async def replace(self, session, item_id, value):
         await session.execute(self.delete_query(item_id))
-        for num, rel_id in enumerate(value):
-            order = self.ordered and (num+1) or None
-            await session.execute(
-                self.insert_query(item_id, rel_id, order=order))
+        await self.insert(session, [(item_id, value)])
+
+    async def load_rows(self, session, item_id):
+        columns = [self.remote_field]
+        if self.ordered:
+            columns.append(self.order_field)
+        # locked on the primary, concurrent stores of the item wait instead
+        # of inserting the same links
+        query = sa.sql.select(columns).where(self.local_field == item_id) \
+            .with_for_update()
+        rows = await session.execute(query)
+        return [(row[self.remote_field], self.ordered and \
+                 row[self.order_field] or None) for row in rows]
+
+    async def insert(self, session, values):
+        rows = []
+        for item_id, value in values:
+            for num, rel_id in enumerate(value):
+                order = self.ordered and (num+1) or None
+                rows.append(self.row_values(item_id, rel_id, order=order))
+        if rows:
+            await session.execute(sa.sql.insert(self.table).values(rows))
+
+    async def replace_items(self, session, values):
+        item_ids = [item_id for item_id, value in values]
+        await session.execute(
+            sa.sql.delete(self.table).where(self.local_field.in_(item_ids)))
+        await self.insert(session, values)
 
     async def delete(self, session, item_id):
         await session.execute(self.delete_query(item_id))
@@ -103,17 +156,40 @@ class M2M:
             s = s.order_by(self.order_field)
         return s
 
-    def delete_query(self, local_id):
-        return sa.sql.delete(self.table).where(self.local_field == local_id)
+    def union_query(self, key, item_ids):
+        order = self.order_field if self.ordered else sa.literal(0)
+        return sa.sql.select([
+            sa.literal(key).label('relation'),
+            self.local_field.label('local_id'),
+            self.remote_field.label('remote_id'),
+            order.label('position'),
+        ]).where(self.local_field.in_(item_ids))
+
+    def delete_query(self, local_id, remote_ids=None):
+        query = sa.sql.delete(self.table).where(self.local_field == local_id)
+        if remote_ids is not None:
+            query = query.where(self.remote_field.in_(remote_ids))
+        return query
+
+    def reorder_query(self, local_id, orders):
+        order = sa.case(orders, value=self.remote_field)
+        return sa.sql.update(self.table) \
+            .values({self.order_field_name: order}) \
+            .where(self.local_field == local_id) \
+            .where(self.remote_field.in_(list(orders)))
 
     def insert_query(self, local_id, remote_id, order=None):
+        values = self.row_values(local_id, remote_id, order=order)
+        return sa.sql.insert(self.table).values(**values)
+
+    def row_values(self, local_id, remote_id, order=None):
         values = {
             self.local_field_name: local_id,
             self.remote_field_name: remote_id,
         }
         if order:
             values[self.order_field_name] = order
-        return sa.sql.insert(self.table).values(**values)
+        return values
 
 
 class I18nM2M(M2M):
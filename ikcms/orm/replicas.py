@@ -0,0 +1,30 @@
+import itertools
+
+
+__all__ = (
+    'ReplicaPool',
+)
+
+
+class ReplicaPool:
+
+    strategies = ('round_robin', 'least_busy')
+
+    def __init__(self, engines, strategy='round_robin'):
+        assert engines, 'Replica pool is empty'
+        assert strategy in self.strategies, \
+            'Unknown replica strategy "{}"'.format(strategy)
+        self.engines = list(engines)
+        self.strategy = strategy
+        self._counter = itertools.count()
+
+    def choose(self):
+        return getattr(self, 'choose_' + self.strategy)()
+
+    def choose_round_robin(self):
+        return self.engines[next(self._counter) % len(self.engines)]
+
+    def choose_least_busy(self):
+        # aiomysql engines expose pool size and number of free connections
+        return min(self.engines, key=lambda engine: \
+                   getattr(engine, 'size', 0) - getattr(engine, 'freesize', 0))
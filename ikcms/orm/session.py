@@ -1,52 +1,156 @@
+import asyncio
+import logging
+import time
+
+import sqlalchemy as sa
+
+from .statements import Statement
+from .query import Explain
+from .identity_map import IdentityMap
+from .loader import Loader
+from .instrumentation import Instrumentation
 from . import exc
 
+
+logger = logging.getLogger(__name__)
+
+
 class Session:
 
-    def __init__(self, engines, binds, **kwargs):
+    default_instrumentation = Instrumentation()
+
+    def __init__(self, engines, binds, identity_map=False, replicas=None,
+                 readonly=False, instrumentation=None, commit_hooks=None,
+                 **kwargs):
         self.engines = engines
         self.binds = binds
+        # readonly sessions run in autocommit mode and never BEGIN
+        self.readonly = readonly
+        # table: ReplicaPool
+        self.replicas = replicas or {}
+        self.replica_engines = {}
+        self.has_writes = False
+        self.written_tables = set()
+        # async hook(session, tables) called after a successful commit
+        self.commit_hooks = commit_hooks or []
         self.connections = {}
         self.transactions = {}
+        self.identity_map = IdentityMap() if identity_map else None
+        self.loader = Loader(self)
+        instrumentation = instrumentation or self.default_instrumentation
+        self.stats = instrumentation.create_stats()
         self.__dict__.update(kwargs)
 
     def get_engine(self, query):
+        return self.binds[self.get_table(query)]
+
+    def get_table(self, query):
+        if isinstance(query, Statement):
+            query = query.query
+        if isinstance(query, Explain):
+            query = query.query
+        if hasattr(query, 'selects'):
+            # Union
+            query = query.selects[0]
         if hasattr(query, 'table'):
             # Insert, Update, Delete
-            table = query.table
+            return query.table
         elif hasattr(query, '_froms'):
             # Select
-            table = list(query._froms)[0]
+            return list(query._froms)[0]
         else:
             raise exc.OrmError("Can't get query table")
-        return self.binds[table]
 
-    async def execute(self, query):
-        conn = await self.get_connection(self.get_engine(query))
-        return await conn.execute(query)
+    def is_read(self, query):
+        if isinstance(query, Statement):
+            query = query.query
+        if isinstance(query, sa.sql.Select):
+            return query._for_update_arg is None
+        return isinstance(query, (sa.sql.CompoundSelect, Explain))
+
+    def is_locking_read(self, query):
+        if isinstance(query, Statement):
+            query = query.query
+        return isinstance(query, sa.sql.Select) and \
+            query._for_update_arg is not None
+
+    def get_read_engine(self, query):
+        engine = self.get_engine(query)
+        if self.has_writes or not self.replicas or not self.is_read(query):
+            return engine
+        pool = self.replicas.get(self.get_table(query))
+        if pool is None:
+            return engine
+        # one replica per session, reads stay consistent with each other
+        if pool not in self.replica_engines:
+            self.replica_engines[pool] = pool.choose()
+        return self.replica_engines[pool]
+
+    async def execute(self, query, params=None):
+        if self.is_read(query):
+            engine = self.get_read_engine(query)
+            conn = await self.get_connection(engine)
+        else:
+            if self.readonly:
+                raise exc.OrmError('Write statement in readonly session')
+            # read your writes, the primary serves everything after a write
+            # or a locking read
+            self.has_writes = True
+            if not self.is_locking_read(query):
+                self.written_tables.add(self.get_table(query))
+            engine = self.get_engine(query)
+            conn = await self.get_connection(engine)
+            # transaction starts with the first write statement
+            if engine not in self.transactions:
+                await self._begin(engine)
+        if not isinstance(query, Statement):
+            query = Statement(query)
+        started = time.perf_counter()
+        compiled = query.compile(engine.dialect)
+        compiled_at = time.perf_counter()
+        execute_compiled = getattr(conn, 'execute_compiled', None)
+        if execute_compiled is not None:
+            result = await execute_compiled(compiled, params or {})
+        else:
+            # connections of other drivers compile the query themselves
+            result = await conn.execute(query.query, params or {})
+        self.stats.add(
+            kind=query.kind,
+            table=getattr(self.get_table(query), 'name', None),
+            sql=compiled.sql,
+            compile_time=compiled_at - started,
+            execute_time=time.perf_counter() - compiled_at,
+            rows=result.rowcount,
+        )
+        return result
 
     async def get_connection(self, engine):
         conn = self.connections.get(engine)
         if conn:
             return conn
         self.connections[engine] = await engine.acquire()
-        await self._begin(engine)
         return self.connections[engine]
 
     async def close(self):
-        for engine in list(self.transactions):
-            await self._rollback(engine)
-        for engine, conn in self.connections.items():
-            engine.release(conn)
+        try:
+            await self._rollback_all(list(self.transactions))
+        finally:
+            for engine, conn in self.connections.items():
+                engine.release(conn)
 
     async def commit(self):
-        for engine in list(self.transactions):
-            await self._commit(engine)
-            await self._begin(engine)
+        await self._commit_all(list(self.transactions))
 
     async def rollback(self):
-        for engine in list(self.transactions):
-            await self._rollback(engine)
-            await self._begin(engine)
+        if self.identity_map is not None:
+            self.identity_map.clear()
+        self.written_tables.clear()
+        await self._rollback_all(list(self.transactions))
+
+    def get_db_id(self, engine):
+        for db_id, db_engine in self.engines.items():
+            if db_engine is engine:
+                return db_id
 
     async def _begin(self, engine):
         assert engine not in self.transactions
@@ -59,8 +163,50 @@ class Session:
 
     async def _rollback(self, engine):
         assert engine in self.transactions
-        await self.transactions[engine].rollback()
-        del self.transactions[engine]
+        await self.transactions.pop(engine).rollback()
+
+    async def _commit_all(self, engines):
+        results = await asyncio.gather(
+            *[self._commit(engine) for engine in engines],
+            return_exceptions=True,
+        )
+        errors = {engine: result for engine, result in zip(engines, results) \
+                  if isinstance(result, BaseException)}
+        if errors:
+            # failed engines are still in transaction
+            if self.identity_map is not None:
+                self.identity_map.clear()
+            await asyncio.gather(
+                *[self._rollback(engine) for engine in errors],
+                return_exceptions=True,
+            )
+            raise exc.CommitError(
+                [self.get_db_id(engine) for engine in engines \
+                 if engine not in errors],
+                {self.get_db_id(engine): error \
+                 for engine, error in errors.items()},
+            )
+        tables, self.written_tables = self.written_tables, set()
+        if tables:
+            await self._run_commit_hooks(tables)
+
+    async def _run_commit_hooks(self, tables):
+        for hook in self.commit_hooks:
+            try:
+                await hook(self, tables)
+            except Exception:
+                # changes are committed already
+                logger.exception('Commit hook %r failed', hook)
+
+    async def _rollback_all(self, engines):
+        # every rollback finishes before connections may be released
+        results = await asyncio.gather(
+            *[self._rollback(engine) for engine in engines],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
     async def __aenter__(self):
         return self
@@ -69,7 +215,8 @@ class Session:
         if exc_type:
             await self.close()
         else:
-            for engine in list(self.transactions):
-                await self._commit(engine)
-            await self.close()
+            try:
+                await self._commit_all(list(self.transactions))
+            finally:
+                await self.close()
 
@@ -0,0 +1,91 @@
+import re
+
+
+__all__ = (
+    'Statement',
+    'CompiledStatement',
+    'StatementCache',
+)
+
+
+EXPANDING_RE = re.compile(r'(?:__)?\[(?:EXPANDING|POSTCOMPILE)_(\w+)\]')
+
+
+class Statement:
+
+    def __init__(self, query, column_keys=None):
+        self.query = query
+        self.column_keys = column_keys
+        self.compiled = {}
+
+    @property
+    def kind(self):
+        # select, insert, update, delete
+        return self.query.__visit_name__.replace('compound_', '')
+
+    def compile(self, dialect):
+        compiled = self.compiled.get(dialect)
+        if compiled is None:
+            compiled = CompiledStatement(self, dialect)
+            self.compiled[dialect] = compiled
+        return compiled
+
+
+class CompiledStatement:
+
+    def __init__(self, statement, dialect):
+        self.statement = statement
+        self.compiled = statement.query.compile(
+            dialect=dialect,
+            column_keys=statement.column_keys,
+        )
+        self.sql = str(self.compiled)
+        self.result_map = self.compiled._result_columns
+        self.bind_processors = self.compiled._bind_processors
+        self.bindtemplate = self.compiled.bindtemplate
+        self.expanding = set(EXPANDING_RE.findall(self.sql))
+
+    def render(self, params):
+        params = self.compiled.construct_params(params)
+        processed = {}
+        expanded = {}
+        for key, value in params.items():
+            processor = self.bind_processors.get(key)
+            if key in self.expanding:
+                names = []
+                for num, item in enumerate(value):
+                    name = '{}_{}'.format(key, num + 1)
+                    processed[name] = processor(item) if processor else item
+                    names.append(self.bindtemplate % {'name': name})
+                expanded[key] = ', '.join(names) or 'NULL'
+            else:
+                processed[key] = processor(value) if processor else value
+        sql = self.sql
+        if expanded:
+            sql = EXPANDING_RE.sub(lambda m: expanded[m.group(1)], sql)
+        return sql, processed
+
+
+class StatementCache(dict):
+
+    def __init__(self):
+        super().__init__()
+        self.hits = 0
+        self.misses = 0
+
+    def get_statement(self, key, factory, column_keys=None):
+        statement = self.get(key)
+        if statement is None:
+            self.misses += 1
+            statement = Statement(factory(), column_keys=column_keys)
+            self[key] = statement
+        else:
+            self.hits += 1
+        return statement
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self),
+        }
@@ -0,0 +1,94 @@
+import json
+import base64
+
+import sqlalchemy as sa
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+
+__all__ = (
+    'CursorError',
+    'encode_cursor',
+    'decode_cursor',
+    'order_keys',
+    'order_clauses',
+    'seek_clause',
+)
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf8')).decode('ascii')
+
+
+def decode_cursor(cursor, length=None):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        values = json.loads(raw.decode('utf8'))
+    except (ValueError, TypeError, AttributeError):
+        raise CursorError(cursor)
+    if not isinstance(values, list):
+        raise CursorError(cursor)
+    if length is not None and len(values) != length:
+        raise CursorError(cursor)
+    return values
+
+
+def order_keys(clauses, tie_breaker):
+    """ Returns [(column, desc), ...] ending with the tie breaker column """
+    keys = []
+    for clause in clauses:
+        if isinstance(clause, UnaryExpression) and \
+                clause.modifier in (operators.desc_op, operators.asc_op):
+            keys.append((clause.element, clause.modifier is operators.desc_op))
+        else:
+            keys.append((clause, False))
+    if not any(column is tie_breaker for column, desc in keys):
+        keys.append((tie_breaker, False))
+    return keys
+
+
+def order_clauses(keys, reverse=False):
+    return [column.desc() if desc != reverse else column.asc() \
+            for column, desc in keys]
+
+
+def seek_clause(keys, values, reverse=False):
+    """ Rows coming after values in keys order. NULLs sort as the smallest
+        values, the way MySQL sorts them """
+    conditions = []
+    for num, (column, desc) in enumerate(keys):
+        condition = _beyond(column, values[num], less=desc != reverse)
+        if condition is None:
+            continue
+        equals = [_equals(prev_column, value) \
+                  for (prev_column, _), value in zip(keys[:num], values)]
+        conditions.append(sa.and_(*(equals + [condition])))
+    if not conditions:
+        return sa.false()
+    return sa.or_(*conditions)
+
+
+def _beyond(column, value, less):
+    nullable = getattr(column, 'nullable', True)
+    if less:
+        if value is None:
+            # nothing is less than NULL
+            return None
+        condition = column < value
+        if nullable:
+            condition = sa.or_(condition, column.is_(None))
+        return condition
+    if value is None:
+        return column.isnot(None)
+    return column > value
+
+
+def _equals(column, value):
+    if value is None:
+        return column.is_(None)
+    return column == value
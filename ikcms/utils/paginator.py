@@ -1,6 +1,9 @@
 import math
 
+import sqlalchemy as sa
+
 from ikcms.utils import cached_property
+from ikcms.utils import keyset
 
 
 class PageNotFound(Exception):
@@ -38,11 +41,44 @@ class Paginator(object):
 
 
 
-    def __init__(self, query, limit):
+    class CursorPage(object):
+
+        def __init__(self, paginator, items, has_prev, has_next):
+            self.paginator = paginator
+            self.items = items
+            self.has_prev = has_prev and bool(items)
+            self.has_next = has_next and bool(items)
+            self.prev_cursor = self.has_prev and \
+                paginator.cursor(items[0]) or None
+            self.next_cursor = self.has_next and \
+                paginator.cursor(items[-1]) or None
+
+        def __iter__(self):
+            return self.items.__iter__()
+
+        @cached_property
+        def next_page(self):
+            if self.has_next:
+                return self.paginator.cursor_page(after=self.next_cursor)
+
+        @cached_property
+        def prev_page(self):
+            if self.has_prev:
+                return self.paginator.cursor_page(before=self.prev_cursor)
+
+
+    def __init__(self, query, limit, tie_breaker=None):
         self.query = query
         self.limit = limit
-        self.count = query.count()
-        self.pages_count = int(math.ceil(float(self.count or 1) / self.limit))
+        self.tie_breaker = tie_breaker
+
+    @cached_property
+    def count(self):
+        return self.query.count()
+
+    @cached_property
+    def pages_count(self):
+        return int(math.ceil(float(self.count or 1) / self.limit))
 
     def page(self, page):
         try:
@@ -56,3 +92,43 @@ class Paginator(object):
     def _get_items(self, page):
         return self.query[self.limit * (page - 1):self.limit * page]
 
+    def cursor_page(self, after=None, before=None):
+        keys = self.order_keys
+        reverse = before is not None
+        cursor = before if reverse else after
+        query = self.query
+        if cursor is not None:
+            try:
+                values = keyset.decode_cursor(cursor, len(keys))
+            except keyset.CursorError:
+                raise PageNotFound(cursor)
+            query = query.filter(keyset.seek_clause(keys, values, reverse))
+        query = query.order_by(None).order_by(
+            *keyset.order_clauses(keys, reverse))
+        items = query.limit(self.limit + 1).all()
+        has_more = len(items) > self.limit
+        items = items[:self.limit]
+        if reverse:
+            items.reverse()
+            return self.CursorPage(self, items, has_more, True)
+        return self.CursorPage(self, items, cursor is not None, has_more)
+
+    def cursor(self, item):
+        return keyset.encode_cursor(
+            [getattr(item, key) for key in self.order_attrs])
+
+    @cached_property
+    def mapper(self):
+        return sa.inspect(self.query.column_descriptions[0]['entity'])
+
+    @cached_property
+    def order_keys(self):
+        tie_breaker = self.tie_breaker
+        if tie_breaker is None:
+            tie_breaker = self.mapper.primary_key[0]
+        return keyset.order_keys(self.query._order_by or [], tie_breaker)
+
+    @cached_property
+    def order_attrs(self):
+        return [self.mapper.get_property_by_column(column).key \
+                for column, desc in self.order_keys]
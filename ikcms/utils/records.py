@@ -0,0 +1,108 @@
+""" Compact read-only-by-key rows: a record keeps only the list of its
+    values, field names are shared by the record class. Records support the
+    mapping protocol used by forms and streams (item[key], item.get(key),
+    keys(), items()) """
+
+import functools
+
+
+__all__ = (
+    'Record',
+    'record_class',
+)
+
+
+class NOTSET:
+    pass
+
+
+class Record:
+
+    # values by position of the field, NOTSET for unset fields
+    __slots__ = ('_values',)
+    _fields = ()
+    _index = {}
+
+    def __init__(self, *values):
+        missing = len(self._fields) - len(values)
+        if missing < 0:
+            raise TypeError('{} takes {} values, {} given'.format(
+                self.__class__.__name__, len(self._fields), len(values)))
+        self._values = list(values)
+        if missing:
+            self._values.extend([NOTSET] * missing)
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        record = cls.__new__(cls)
+        record._values = [mapping[key] if key in mapping else NOTSET \
+                          for key in cls._fields]
+        return record
+
+    def __getitem__(self, key):
+        index = self._index.get(key)
+        if index is None or self._values[index] is NOTSET:
+            raise KeyError(key)
+        return self._values[index]
+
+    def __setitem__(self, key, value):
+        self._values[self._index[key]] = value
+
+    def __contains__(self, key):
+        index = self._index.get(key)
+        return index is not None and self._values[index] is not NOTSET
+
+    def __iter__(self):
+        # unset fields behave like missing dict keys
+        return (key for key, value in zip(self._fields, self._values) \
+                if value is not NOTSET)
+
+    def __len__(self):
+        return len(self._values) - self._values.count(NOTSET)
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return '{}({})'.format(
+            self.__class__.__name__,
+            ', '.join('{}={!r}'.format(k, v) for k, v in self.items()),
+        )
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        if index is None:
+            return default
+        value = self._values[index]
+        return default if value is NOTSET else value
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return list(self.to_dict().values())
+
+    def items(self):
+        return list(self.to_dict().items())
+
+    def to_dict(self):
+        values = self._values
+        if NOTSET in values:
+            return {key: value for key, value in zip(self._fields, values) \
+                    if value is not NOTSET}
+        return dict(zip(self._fields, values))
+
+
+@functools.lru_cache(maxsize=None)
+def record_class(name, fields):
+    fields = tuple(fields)
+    if len(set(fields)) != len(fields):
+        raise ValueError('Duplicate record fields: {}'.format(fields))
+    # fields are looked up by position, any column name is allowed
+    return type(name, (Record,), {
+        '__slots__': (),
+        '_fields': fields,
+        '_index': {field: index for index, field in enumerate(fields)},
+    })
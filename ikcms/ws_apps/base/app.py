@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from . import exceptions
@@ -8,6 +9,13 @@ logger = logging.getLogger(__name__)
 
 class Base:
 
+    # requests of one client handled at the same time, 1 handles them one
+    # by one in the order they came
+    max_in_flight = 1
+    # handlers whose requests of one client are handled and answered in
+    # the order they came when max_in_flight > 1
+    ordered_handlers = frozenset()
+
     def __init__(self, cfg):
         """ Called before started ws server """
         self.cfg = cfg
@@ -21,29 +29,92 @@ class Base:
     async def __call__(self, server, client_id):
         """ Called when client connected """
         client = await self.add_client(server, client_id)
+        if self.max_in_flight > 1:
+            await self.serve_concurrent(server, client_id, client)
+        else:
+            await self.serve(server, client_id, client)
+        await self.remove_client(client_id)
+
+    async def serve(self, server, client_id, client):
         while True:
             try:
                 raw_request = await server.recv(client_id)
             except Exception as exc:
                 await self.handle_connection_error(client, exc)
                 break
+            request, error = self._decode(client, raw_request)
+            raw_response = await self.respond(client, request, error)
+            if not await self.send(server, client_id, client, raw_response):
+                break
 
-            request = None
-            try:
-                request = self.decode_request(raw_request)
-                response = await self.handle(client, request)
-            except exceptions.ClientError as exc:
-                response = await self.handle_client_error(client, exc, request)
-            except Exception as exc:
-                response = await self.handle_server_error(client, exc, request)
-
-            raw_response = self.encode_response(response)
+    async def serve_concurrent(self, server, client_id, client):
+        """ Every request runs in its own task, responses are sent as soon
+            as they are ready """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        locks = {}
+        tasks = set()
+        while True:
+            # stop reading while the client has max_in_flight requests
+            await semaphore.acquire()
             try:
-                await server.send(client_id, raw_response)
+                raw_request = await server.recv(client_id)
             except Exception as exc:
                 await self.handle_connection_error(client, exc)
                 break
-        await self.remove_client(client_id)
+            request, error = self._decode(client, raw_request)
+            lock = None
+            if request is not None and \
+                    request.get('handler') in self.ordered_handlers:
+                lock = locks.setdefault(request['handler'], asyncio.Lock())
+            task = asyncio.ensure_future(self.dispatch(
+                server, client_id, client, request, error, lock))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda task: semaphore.release())
+        if tasks:
+            # let handlers finish, their responses are dropped
+            await asyncio.wait(tasks)
+
+    async def dispatch(self, server, client_id, client, request, error,
+                       lock=None):
+        try:
+            if lock is None:
+                raw_response = await self.respond(client, request, error)
+                await self.send(server, client_id, client, raw_response)
+            else:
+                # tasks start in creation order, so the lock is taken in
+                # the order the requests came
+                async with lock:
+                    raw_response = await self.respond(client, request, error)
+                    await self.send(server, client_id, client, raw_response)
+        except Exception as exc:
+            # nobody awaits the task
+            logger.exception(exc)
+
+    async def respond(self, client, request, error=None):
+        try:
+            if error is not None:
+                raise error
+            response = await self.handle(client, request)
+        except exceptions.ClientError as exc:
+            response = await self.handle_client_error(client, exc, request)
+        except Exception as exc:
+            response = await self.handle_server_error(client, exc, request)
+        return self.encode_response(response, client)
+
+    async def send(self, server, client_id, client, raw_response):
+        try:
+            await server.send(client_id, raw_response)
+        except Exception as exc:
+            await self.handle_connection_error(client, exc)
+            return False
+        return True
+
+    def _decode(self, client, raw_request):
+        try:
+            return self.decode_request(raw_request, client), None
+        except Exception as exc:
+            return None, exc
 
     async def add_client(self, server, client_id):
         if client_id in self.clients:
@@ -58,10 +129,10 @@ class Base:
             raise exceptions.ClientNotFoundError(client_id)
         await client.close()
 
-    def decode_request(self, raw_request):
+    def decode_request(self, raw_request, client=None):
         raise NotImplementedError
 
-    def encode_response(self, raw_request):
+    def encode_response(self, response, client=None):
         raise NotImplementedError
 
     async def handle_connection_error(self, client, exc):
@@ -77,11 +148,27 @@ class Base:
 class App(Base):
 
     protocol = protocols.Json()
+    # protocols clients may choose with websocket subprotocol negotiation,
+    # the ones not choosing get protocol
+    subprotocols = ()
 
     def __init__(self, cfg):
         super().__init__(cfg)
         self.handlers = self.get_handlers()
 
+    @property
+    def subprotocol_names(self):
+        return [protocol.name for protocol in self.subprotocols]
+
+    def get_protocol(self, subprotocol=None):
+        for protocol in self.subprotocols:
+            if protocol.name == subprotocol:
+                return protocol
+        return self.protocol
+
+    def get_client_protocol(self, client):
+        return getattr(client, 'protocol', None) or self.protocol
+
     def get_handlers(self):
         return {}
 
@@ -92,20 +179,49 @@ class App(Base):
                 exceptions.HandlerNotAllowedError(request['handler']),
             )
         response = await handler(client, request['body'])
-        return self.protocol.ResponseMessage(
+        return self.protocol.ResponseMessage.trusted(
             name='response',
             request_id=request['request_id'],
             handler=request['handler'],
             body=response,
         )
 
+    def notification(self, handler, body):
+        return self.protocol.NotificationMessage.trusted(
+            name='notification',
+            handler=handler,
+            body=body,
+        )
+
+    async def broadcast(self, message, clients=None, key=None):
+        """ Sends message to clients, all connected ones by default. The
+            message is encoded once for every protocol in use and the same
+            bytes are queued for every client. With coalescing servers a
+            queued message with the same key is replaced by this one.
+            Returns the number of clients the message was queued for. """
+        if clients is None:
+            clients = list(self.clients.values())
+        groups = {}
+        for client in clients:
+            group = (client._server, self.get_client_protocol(client))
+            groups.setdefault(group, []).append(client._client_id)
+        raw_messages = {}
+        sent = 0
+        for (server, protocol), client_ids in groups.items():
+            raw_message = raw_messages.get(protocol)
+            if raw_message is None:
+                raw_message = raw_messages[protocol] = \
+                    protocol.encode_response(message)
+            sent += await server.broadcast(client_ids, raw_message, key=key)
+        return sent
+
     async def handle_connection_error(self, client, exc):
         logger.debug(exc, exc_info=True)
 
     async def handle_client_error(self, client, exc, request):
         logger.debug(exc, exc_info=True)
         request = request or {}
-        return self.protocol.ErrorMessage(
+        return self.protocol.ErrorMessage.trusted(
             name='error',
             request_id=request.get('request_id', ''),
             handler=request.get('handler', ''),
@@ -119,7 +235,7 @@ class App(Base):
     async def handle_server_error(self, client, exc, request):
         logger.exception(exc, exc_info=True)
         request = request or {}
-        return self.protocol.ErrorMessage(
+        return self.protocol.ErrorMessage.trusted(
             name='error',
             request_id=request.get('request_id'),
             handler=request.get('handler'),
@@ -130,12 +246,13 @@ class App(Base):
             )
         )
 
-    def decode_request(self, raw_request):
+    def decode_request(self, raw_request, client=None):
+        protocol = self.get_client_protocol(client)
         try:
-            return self.protocol.decode_request(raw_request)
+            return protocol.decode_request(raw_request)
         except exceptions.ProtocolError as exc:
             raise exceptions.ClientError(exc)
 
-    def encode_response(self, response):
-        return self.protocol.encode_response(response)
+    def encode_response(self, response, client=None):
+        return self.get_client_protocol(client).encode_response(response)
 
@@ -3,3 +3,13 @@ import ikcms.cfg.base
 class Cfg(ikcms.cfg.base.Cfg):
 
     WS_SERVER = 'ws://localhost:8888'
+    # worker processes sharing WS_SERVER port, see `app:serve --workers`
+    WS_WORKERS = 1
+    # set in every worker process
+    WS_WORKER_ID = None
+    # seconds between worker metrics log records, None disables them
+    WS_METRICS_INTERVAL = None
+    # outgoing messages queued for one client and what to do with a
+    # client whose queue is full: 'drop', 'coalesce' or 'disconnect'
+    WS_SEND_QUEUE_SIZE = 256
+    WS_SLOW_CLIENT_POLICY = 'disconnect'
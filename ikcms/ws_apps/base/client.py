@@ -9,6 +9,7 @@ class Client:
         self._server = server
         self._client_id = client_id
         self.session_id = self.get_session_id()
+        self.protocol = app.get_protocol(server.get_subprotocol(client_id))
 
     def get_session_id(self):
         salt = self.app.cfg.WS_AUTH_SECRET
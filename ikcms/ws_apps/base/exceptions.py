@@ -66,6 +66,14 @@ class JSONDecodeError(ProtocolError):
         super().__init__(line=line, column=column, pos=pos)
 
 
+class DecodeError(ProtocolError):
+
+    message = 'Can not decode message: {error}'
+
+    def __init__(self, error):
+        super().__init__(error=error)
+
+
 class RequestTypeError(ProtocolError):
 
     message = 'The request type must be "{required_type}", not "{current_type}"'
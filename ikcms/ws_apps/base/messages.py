@@ -1,5 +1,3 @@
-import json
-
 from .forms import MessageForm
 from .forms import message_fields
 
@@ -11,6 +9,7 @@ __all__ = [
     'Request',
     'Response',
     'Error',
+    'Notification',
 ]
 
 class Base(dict):
@@ -24,11 +23,26 @@ class Base(dict):
         ]
 
     def __init__(self, **kwargs):
-        kwargs = self.Form().to_python_or_exc(kwargs)
+        kwargs = self.get_form().to_python_or_exc(kwargs)
         if self.name and kwargs['name']!=self.name:
-            raise MessageError(errors={'name':'Name error'})
+            raise exceptions.MessageError({'name': 'Name error'})
         super().__init__(**kwargs)
 
+    @classmethod
+    def get_form(cls):
+        # built once per message class, forms keep no state between calls
+        form = cls.__dict__.get('_form')
+        if form is None:
+            form = cls._form = cls.Form()
+        return form
+
+    @classmethod
+    def trusted(cls, **kwargs):
+        """ Message built by the server, all fields are given and valid """
+        message = cls.__new__(cls)
+        dict.update(message, kwargs)
+        return message
+
 
 class Request(Base):
 
@@ -68,3 +82,16 @@ class Error(Base):
             message_fields.body__error_required,
         ]
 
+
+
+class Notification(Base):
+    """ Message the server sends on its own, not answering a request """
+
+    name = 'notification'
+
+    class Form(MessageForm):
+        fields = [
+            message_fields.name__required,
+            message_fields.handler__required,
+            message_fields.body,
+        ]
@@ -1,4 +1,11 @@
 import json
+from datetime import date
+from datetime import datetime
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 from . import exceptions
 from . import messages
@@ -6,16 +13,21 @@ from . import messages
 
 __all__ = (
     'Base',
-    'Json'
+    'Json',
+    'MsgPack',
 )
 
 
 class Base:
 
+    # websocket subprotocol name
+    name = None
+
     BaseMessage = messages.Base
     RequestMessage = messages.Request
     ResponseMessage = messages.Response
     ErrorMessage = messages.Error
+    NotificationMessage = messages.Notification
 
     request_messages = {
         RequestMessage.name: RequestMessage,
@@ -23,6 +35,7 @@ class Base:
     response_messages = {
         ResponseMessage.name: ResponseMessage,
         ErrorMessage.name: ErrorMessage,
+        NotificationMessage.name: NotificationMessage,
     }
 
     def decode(self, raw_data):
@@ -33,14 +46,16 @@ class Base:
 
     def decode_request(self, raw_request):
         request = self.decode(raw_request)
-        base_message = self.BaseMessage(**request)
-        message_cls = self.request_messages.get(base_message['name'])
-        if message_cls is None:
-            raise exceptions.MessageError(
-                {'name': 'Name {} not allowed'.format(base_message['name'])},
-            )
-        else:
+        name = request.get('name')
+        message_cls = isinstance(name, str) and \
+            self.request_messages.get(name) or None
+        if message_cls is not None:
+            # validated once, against the schema of the message
             return message_cls(**request)
+        base_message = self.BaseMessage(**request)
+        raise exceptions.MessageError(
+            {'name': 'Name {} not allowed'.format(base_message['name'])},
+        )
 
     def encode_response(self, response_message):
         assert response_message['name'] in self.response_messages
@@ -49,6 +64,8 @@ class Base:
 
 class Json(Base):
 
+    name = 'json'
+
     def decode(self, raw_data):
         try:
             python_data = json.loads(raw_data)
@@ -62,3 +79,49 @@ class Json(Base):
         assert isinstance(python_data, dict), 'Response must be the dict'
         return json.dumps(python_data)
 
+
+class MsgPack(Base):
+    """ MessagePack with binary bytes, date and datetime values are sent
+        as extension types holding the ISO format string """
+
+    name = 'msgpack'
+
+    EXT_DATE = 1
+    EXT_DATETIME = 2
+
+    def __init__(self):
+        assert msgpack is not None, 'msgpack is not installed'
+
+    def decode(self, raw_data):
+        if not isinstance(raw_data, (bytes, bytearray)):
+            raise exceptions.RequestTypeError(
+                'bytes', type(raw_data).__name__)
+        try:
+            python_data = msgpack.unpackb(
+                raw_data, raw=False, ext_hook=self._ext_hook)
+        except Exception as exc:
+            raise exceptions.DecodeError(str(exc))
+        if not isinstance(python_data, dict):
+            raise exceptions.RequestTypeError('dict', type(python_data).__name__)
+        return python_data
+
+    def encode(self, python_data):
+        assert isinstance(python_data, dict), 'Response must be the dict'
+        return msgpack.packb(
+            python_data, use_bin_type=True, default=self._default)
+
+    def _default(self, value):
+        # datetime is a subclass of date
+        if isinstance(value, datetime):
+            return msgpack.ExtType(
+                self.EXT_DATETIME, value.isoformat().encode())
+        if isinstance(value, date):
+            return msgpack.ExtType(self.EXT_DATE, value.isoformat().encode())
+        raise TypeError('Can not serialize {!r}'.format(value))
+
+    def _ext_hook(self, code, data):
+        if code == self.EXT_DATETIME:
+            return datetime.fromisoformat(data.decode())
+        if code == self.EXT_DATE:
+            return date.fromisoformat(data.decode())
+        return msgpack.ExtType(code, data)
@@ -1,9 +1,13 @@
 import asyncio
+import logging
 
 import ikcms.ws_apps.base
+from ikcms.orm import instrumentation
 
 from . import exceptions
 
+logger = logging.getLogger(__name__)
+
 
 class App(ikcms.ws_apps.base.App):
 
@@ -25,11 +29,27 @@ class App(ikcms.ws_apps.base.App):
         # save components order
         results_dict = {result.name: result for result in results}
         self.components = [results_dict[name] for name in names]
+        for component in self.components:
+            component.app_init()
 
     def get_client_class(self):
         from .client import Client
         return Client
 
+    async def handle(self, client, request):
+        with instrumentation.request_stats(request['handler']) as stats:
+            try:
+                return await super().handle(client, request)
+            finally:
+                await self.handle_request_stats(client, request, stats)
+
+    async def handle_request_stats(self, client, request, stats):
+        if stats.sessions:
+            logger.debug('Request %s (worker=%s, action=%s) db totals: %s',
+                         request.get('request_id'),
+                         getattr(self.cfg, 'WS_WORKER_ID', None),
+                         stats.action, stats.totals())
+
     def get_component(self, name):
         for component in self.components:
             if component.name == name:
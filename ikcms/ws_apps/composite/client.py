@@ -1,3 +1,5 @@
+import inspect
+
 import ikcms.ws_apps.base.client
 
 
@@ -10,5 +12,6 @@ class Client(ikcms.ws_apps.base.client.Client):
 
     async def close(self):
         for component in self.app.components:
-            component.client_close(self)
-
+            result = component.client_close(self)
+            if inspect.isawaitable(result):
+                await result
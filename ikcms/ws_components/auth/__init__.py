@@ -100,11 +100,11 @@ class Component(ikcms.ws_components.base.Component):
     async def get_user_by_login(self, login):
         users_mapper = self.app.db.mappers.get_mapper(self.users_mapper)
         query = users_mapper.query().filter_by(login=login)
-        async with await self.app.db() as session:
+        async with await self.app.db(readonly=True) as session:
             user = await query.select_first_item(session)
             if user:
                 await users_mapper.relations['groups'].m.query().fill(
-                    session, user, 'groups')
+                    session, user, 'groups', loader=self.app.db.loader)
         return user
 
     async def get_user_by_token(self, token):
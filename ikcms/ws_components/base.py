@@ -26,6 +26,10 @@ class Component:
             for name in dir(self) if name.startswith('h_')
         }
 
+    def app_init(self):
+        """ Called when all components of the app are created """
+        pass
+
     def client_init(self, env):
         pass
 
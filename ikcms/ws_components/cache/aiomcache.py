@@ -25,6 +25,9 @@ class Component(base.Component):
     async def set(self, key, value, expire=0):
         return await self.memcache.set(self._key(key), value, exptime=expire)
 
+    async def add(self, key, value, expire=0):
+        return await self.memcache.add(self._key(key), value, exptime=expire)
+
     async def delete(self, key):
         return await self.memcache.delete(self._key(key))
 
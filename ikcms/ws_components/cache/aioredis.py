@@ -6,6 +6,14 @@ class Component(base.Component):
 
     DEFAULT_REDIS_HOST = 'localhost'
     DEFAULT_REDIS_PORT = 6379
+    compare_and_delete = True
+
+    DELETE_IF_EQUAL_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
 
     def __init__(self, app, redis):
         super().__init__(app)
@@ -25,8 +33,16 @@ class Component(base.Component):
     async def set(self, key, value, expire=0):
         return await self.redis.set(key, value, expire=expire)
 
+    async def add(self, key, value, expire=0):
+        return bool(await self.redis.set(
+            key, value, expire=expire, exist=self.redis.SET_IF_NOT_EXIST))
+
     async def delete(self, key):
         return await self.redis.delete(key)
 
+    async def delete_if_equal(self, key, value):
+        return bool(await self.redis.eval(
+            self.DELETE_IF_EQUAL_SCRIPT, keys=[key], args=[value]))
+
 
 component = Component.create_cls
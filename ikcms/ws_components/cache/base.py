@@ -4,6 +4,8 @@ from .. import base
 class Component(base.Component):
 
     name = 'cache'
+    # delete_if_equal is atomic
+    compare_and_delete = False
 
     async def get(self, key):
         raise NotImplementedError
@@ -11,7 +13,16 @@ class Component(base.Component):
     async def set(self, key, value, expire=0):
         raise NotImplementedError
 
+    async def add(self, key, value, expire=0):
+        """ Sets value only if key is not set, returns True if it was set """
+        raise NotImplementedError
+
     async def delete(self, key):
         raise NotImplementedError
 
+    async def delete_if_equal(self, key, value):
+        """ Deletes key only if it is set to value, returns True if it was
+            deleted """
+        raise NotImplementedError
+
 
@@ -13,18 +13,35 @@ class Component(ikcms.ws_components.base.Component):
     name = 'db'
     session_cls = orm.Session
 
-    def __init__(self, app, engines):
+    def __init__(self, app, engines, replicas=None):
         super().__init__(app)
         self.engines = engines
+        self.replicas = replicas or {}
 
     @classmethod
     async def create(cls, app):
         databases = getattr(app.cfg, 'DATABASES', {})
         database_params = getattr(app.cfg, 'DATABASE_PARAMS', {})
+        replica_strategy = getattr(
+            app.cfg, 'DATABASE_REPLICA_STRATEGY', 'round_robin')
         engines = {}
+        replicas = {}
         for db_id, url in databases.items():
+            # url or {'url': url, 'replicas': [url, ...]}
+            if isinstance(url, dict):
+                replica_urls = url.get('replicas', [])
+                url = url['url']
+            else:
+                replica_urls = []
             engines[db_id] = await cls.create_engine(db_id, url, database_params)
-        return cls(app, engines)
+            if replica_urls:
+                replicas[db_id] = orm.replicas.ReplicaPool(
+                    [await cls.create_engine(db_id, replica_url,
+                                             database_params) \
+                     for replica_url in replica_urls],
+                    strategy=replica_strategy,
+                )
+        return cls(app, engines, replicas)
 
     @classmethod
     async def create_engine(cls, db_id, url, engine_params=None):
@@ -49,11 +66,44 @@ class Component(ikcms.ws_components.base.Component):
                 binds[table] = self.engines[db_id]
         return binds
 
-    async def __call__(self):
-        return self.session_cls(self.engines, self.binds)
+    @cached_property
+    def replica_binds(self):
+        binds = {}
+        for db_id, pool in self.replicas.items():
+            for table in self.mappers.metadata[db_id].sorted_tables:
+                binds[table] = pool
+        return binds
+
+    @cached_property
+    def instrumentation(self):
+        return orm.instrumentation.Instrumentation(
+            slow_query_time=getattr(self.app.cfg, 'DB_SLOW_QUERY_TIME', 1.0),
+            repeat_limit=getattr(self.app.cfg, 'DB_REPEAT_LIMIT', 20),
+        )
+
+    @cached_property
+    def loader(self):
+        return orm.loader.DbLoader(self)
+
+    @cached_property
+    def commit_hooks(self):
+        # components see committed writes with on_db_commit(session, tables)
+        components = getattr(self.app, 'components', [])
+        return [component.on_db_commit for component in components \
+                if hasattr(component, 'on_db_commit')]
+
+    async def __call__(self, **kwargs):
+        if self.replicas:
+            kwargs.setdefault('replicas', self.replica_binds)
+        kwargs.setdefault('instrumentation', self.instrumentation)
+        kwargs.setdefault('commit_hooks', self.commit_hooks)
+        return self.session_cls(self.engines, self.binds, **kwargs)
 
     async def close(self):
-        for engine in self.engines.values():
+        engines = list(self.engines.values())
+        for pool in self.replicas.values():
+            engines += pool.engines
+        for engine in engines:
             engine.terminate()
             await engine.wait_closed()
 
@@ -6,7 +6,9 @@ from sqlalchemy.exc import DBAPIError
 
 import aiomysql
 import aiomysql.sa
+import aiomysql.sa.result
 import aiomysql.utils
+from pymysql.constants import CLIENT
 
 
 _dialect = MySQLDialect_pymysql(
@@ -38,6 +40,27 @@ class SAConnection(aiomysql.sa.SAConnection):
                 dialect=self._dialect,
             )
 
+    async def execute_compiled(self, compiled, params):
+        statement, params = compiled.render(params)
+        cursor = await self._connection.cursor()
+        try:
+            await cursor.execute(statement, params)
+        except self._dialect.dbapi.Error as e:
+            await cursor.close()
+            raise DBAPIError.instance(
+                statement,
+                params,
+                e,
+                self._dialect.dbapi.Error,
+                dialect=self._dialect,
+            )
+        return aiomysql.sa.result.ResultProxy(
+            self,
+            cursor,
+            self._dialect,
+            compiled.result_map,
+        )
+
 
 class Engine(aiomysql.sa.Engine):
 
@@ -61,6 +84,10 @@ def create_engine(url, **kwargs):
 def _create_engine(minsize=1, maxsize=10, loop=None, **kwargs):
     if loop is None:
         loop = asyncio.get_event_loop()
+    # rowcount of UPDATE is the number of matched rows, not changed ones
+    kwargs.setdefault('client_flag', CLIENT.FOUND_ROWS)
+    # sessions BEGIN explicitly on the first write, reads run in autocommit
+    kwargs.setdefault('autocommit', True)
     pool = yield from aiomysql.create_pool(minsize=minsize, maxsize=maxsize,
                                            loop=loop, **kwargs)
     conn = yield from pool.acquire()
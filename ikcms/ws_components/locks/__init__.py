@@ -1,43 +1,67 @@
-import json
-import datetime
-
 import ikcms.ws_components.base
-from iktomi.utils import cached_property
+
+from . import backends
 
 
 class Component(ikcms.ws_components.base.Component):
 
-    locks = {}
+    name = 'locks'
+    backends = {
+        'memory': backends.MemoryBackend,
+        'cache': backends.CacheBackend,
+    }
+    # overrides LOCKS_BACKEND of the cfg
+    backend_class = None
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend_class = self.get_backend_class()
+        workers = getattr(app.cfg, 'WS_WORKERS', 1)
+        assert backend_class.shared or workers <= 1, \
+            '{} locks are not shared by {} workers, set LOCKS_BACKEND ' \
+            'to "cache"'.format(backend_class.__name__, workers)
+        self.backend = backend_class(app)
+        # a client is connected to one worker, so locks of its session are
+        # known to the process it is connected to
+        self.session_locks = {}
+
+    def app_init(self):
+        self.backend.check()
 
-    def env_close(self, env):
+    def get_backend_class(self):
+        if self.backend_class is not None:
+            return self.backend_class
+        name = getattr(self.app.cfg, 'LOCKS_BACKEND', 'memory')
+        assert name in self.backends, \
+            'Unknown locks backend "{}"'.format(name)
+        return self.backends[name]
+
+    async def client_close(self, env):
         for lock in self.get_locks_by_session_id(env.session_id):
-            del self.locks[lock]
-
-    def acquire(self, env, lock):
-        session_id = self.locks.get(lock)
-        if session_id:
-            return bool(session_id == env.session_id)
-        else:
-            locks[lock] = env.session_id
+            await self.backend.release(lock, env.session_id)
+        self.session_locks.pop(env.session_id, None)
+
+    async def acquire(self, env, lock):
+        if await self.backend.acquire(lock, env.session_id):
+            self._add_session_lock(env.session_id, lock)
             return True
+        return False
 
-    def take(self, env, lock):
-        self.locks[lock] = env.session_id
-
-    def release(self, env, lock):
-        session_id = self.locks.get(lock)
-        if session_id:
-            if session_id == env.session_id:
-                del self.locks[lock]
-                return True
-            else:
-                return False
-        else:
+    async def take(self, env, lock):
+        await self.backend.take(lock, env.session_id)
+        self._add_session_lock(env.session_id, lock)
+
+    async def release(self, env, lock):
+        if await self.backend.release(lock, env.session_id):
+            self.session_locks.get(env.session_id, set()).discard(lock)
             return True
+        return False
 
     def get_locks_by_session_id(self, session_id):
-        return [id for id, sid in self.locks.items() \
-                if sid==session_id]
+        return list(self.session_locks.get(session_id, ()))
+
+    def _add_session_lock(self, session_id, lock):
+        self.session_locks.setdefault(session_id, set()).add(lock)
 
     def _lock_name(self, *names):
         return '.'.join(names)
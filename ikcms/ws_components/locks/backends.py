@@ -0,0 +1,101 @@
+__all__ = (
+    'Backend',
+    'MemoryBackend',
+    'CacheBackend',
+)
+
+
+class Backend:
+    """ Storage of lock owners (session ids) """
+
+    # locks are seen by all worker processes
+    shared = False
+
+    def __init__(self, app):
+        self.app = app
+
+    def check(self):
+        """ Called when all components of the app are created """
+        pass
+
+    async def acquire(self, lock, session_id):
+        raise NotImplementedError
+
+    async def take(self, lock, session_id):
+        raise NotImplementedError
+
+    async def release(self, lock, session_id):
+        raise NotImplementedError
+
+    async def owner(self, lock):
+        raise NotImplementedError
+
+
+class MemoryBackend(Backend):
+    """ Locks of one process, do not use with several workers """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.locks = {}
+
+    async def acquire(self, lock, session_id):
+        return self.locks.setdefault(lock, session_id) == session_id
+
+    async def take(self, lock, session_id):
+        self.locks[lock] = session_id
+
+    async def release(self, lock, session_id):
+        owner = self.locks.get(lock)
+        if owner is None:
+            return True
+        if owner != session_id:
+            return False
+        del self.locks[lock]
+        return True
+
+    async def owner(self, lock):
+        return self.locks.get(lock)
+
+
+class CacheBackend(Backend):
+    """ Locks shared by all workers through the cache component """
+
+    shared = True
+
+    prefix = b'locks:'
+    # locks of crashed workers are never released by their clients
+    expire = 24 * 3600
+
+    @property
+    def cache(self):
+        return self.app.cache
+
+    def check(self):
+        # a lock expired between get and delete could be taken by another
+        # worker, its owner must be compared and deleted in one step
+        assert self.cache.compare_and_delete, \
+            '{} can not release locks atomically, use a cache with ' \
+            'compare_and_delete'.format(type(self.cache).__name__)
+
+    async def acquire(self, lock, session_id):
+        if await self.cache.add(self._key(lock), session_id.encode('utf8'),
+                                expire=self.expire):
+            return True
+        return await self.owner(lock) == session_id
+
+    async def take(self, lock, session_id):
+        await self.cache.set(self._key(lock), session_id.encode('utf8'),
+                             expire=self.expire)
+
+    async def release(self, lock, session_id):
+        if await self.cache.delete_if_equal(
+                self._key(lock), session_id.encode('utf8')):
+            return True
+        return await self.owner(lock) is None
+
+    async def owner(self, lock):
+        value = await self.cache.get(self._key(lock))
+        return value.decode('utf8') if value else None
+
+    def _key(self, lock):
+        return self.prefix + lock.encode('utf8')
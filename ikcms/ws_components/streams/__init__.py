@@ -1,3 +1,7 @@
+import uuid
+
+from iktomi.utils import cached_property
+
 import ikcms.ws_components.base
 from . import exceptions
 from . import streams
@@ -32,6 +36,24 @@ class Component(ikcms.ws_components.base.Component):
             'streams': [s.get_cfg(env) for s in self.streams.values()],
         }
 
+    @cached_property
+    def count_version_keys(self):
+        return {
+            stream.mapper.table: stream.count_version_key \
+            for stream in self.streams.values() \
+            if getattr(stream, 'count_strategy', None) == 'cached'
+        }
+
+    async def on_db_commit(self, session, tables):
+        cache = getattr(self.app, 'cache', None)
+        if cache is None:
+            return
+        keys = {self.count_version_keys[table] for table in tables \
+                if table in self.count_version_keys}
+        version = uuid.uuid4().hex.encode()
+        for key in keys:
+            await cache.set(key, version)
+
     async def h_action(self, env, message):
         stream_name = message.get('stream')
         stream = self.streams.get(stream_name)
@@ -43,6 +43,8 @@ class List(Base):
             message_fields.order,
             message_fields.page,
             message_fields.page_size,
+            message_fields.after,
+            message_fields.before,
         ]
 
     async def list(self, env, message):
@@ -64,19 +66,29 @@ class List(Base):
             raise exceptions.ClientError(
                 exceptions.MessageError({'page_size':'Page size error'}),
             )
-        async with await env.app.db() as session:
-            list_items = await self.stream.list_items(
-                env,
-                session,
-                filters,
-                [order],
-                page,
-                page_size,
-                keys=set(list_form.keys()),
-            )
-            total = await self.stream.count_items(env, session, filters)
+        async with await env.app.db(readonly=True) as session:
+            try:
+                list_items, total, total_kind, has_prev, has_next = \
+                    await self.stream.list_items_with_total(
+                        env,
+                        session,
+                        filters,
+                        [order],
+                        page,
+                        page_size,
+                        keys=set(list_form.keys()),
+                        after=message['after'],
+                        before=message['before'],
+                    )
+            except orm.exc.CursorError as exc:
+                name = message['after'] is not None and 'after' or 'before'
+                raise exceptions.ClientError(
+                    exceptions.MessageError({name: 'Cursor error'}),
+                )
 
         raw_list_items = list_form.values_from_python(list_items)
+        prev_cursor, next_cursor = self.stream.get_cursors(
+            env, list_items, [order], has_prev, has_next)
 
         return {
             'stream': self.stream.name,
@@ -85,12 +97,17 @@ class List(Base):
             'list_fields': list_form.get_cfg(),
             'items': raw_list_items,
             'total': total,
+            'total_kind': total_kind,
             'filters_fields': filter_form.get_cfg(),
             'filters_errors': filters_errors,
             'filters': raw_filters,
             'page_size': page_size,
             'page': page,
             'order': message['order'],
+            'after': message['after'],
+            'before': message['before'],
+            'prev_cursor': prev_cursor,
+            'next_cursor': next_cursor,
         }
     __call__ = list
 
@@ -107,7 +124,7 @@ class GetItem(Base):
 
     async def get_item(self, env, message):
         item_id = message['item_id']
-        async with await env.app.db() as session:
+        async with await env.app.db(readonly=True) as session:
             item = await self.stream.get_item(env, session, item_id)
         if not item:
             raise exceptions.ClientError(
@@ -168,7 +185,10 @@ class CreateItem(Base):
             raise exceptions.ClientError(exc)
         if not errors:
             async with await env.app.db() as session:
-                item = await self.stream.insert_item(env, session, item)
+                try:
+                    item = await self.stream.insert_item(env, session, item)
+                except exceptions.StreamItemAlreadyExists as exc:
+                    raise exceptions.ClientError(exc)
             raw_item = item_fields_form.from_python(item)
         return {
             'item_fields': item_fields_form.get_cfg(),
@@ -6,6 +6,8 @@ __all__ = (
     'filters',
     'page',
     'page_size',
+    'after',
+    'before',
     'order',
     'kwargs',
     'values',
@@ -40,6 +42,22 @@ class page_size(fields.Int):
     raw_required = False
 
 
+class after(fields.String):
+    name = 'after'
+    label = 'Курсор следующей страницы'
+    to_python_default = None
+    raw_required = False
+    not_none = False
+
+
+class before(fields.String):
+    name = 'before'
+    label = 'Курсор предыдущей страницы'
+    to_python_default = None
+    raw_required = False
+    not_none = False
+
+
 class order(fields.String):
     name = 'order'
     label = 'Сортировка'
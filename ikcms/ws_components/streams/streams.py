@@ -1,5 +1,10 @@
+import hashlib
+
 from iktomi.utils import cached_property
 
+from ikcms import orm
+from ikcms.utils import keyset
+
 from .forms import Form
 from . import actions
 from . import exceptions
@@ -40,6 +45,8 @@ class Base:
         action_name = message.get('action')
         action = self.get_action(action_name)
         if action:
+            orm.instrumentation.set_action(
+                '{}.{}'.format(self.id, action_name))
             return action.handle(env, message)
         else:
             raise exceptions.StreamActionNotFoundError(self, action_name)
@@ -63,6 +70,19 @@ class Stream(Base):
 
     widget = 'Stream'
     max_limit = 100
+    # load list pages as __slots__ records instead of dicts
+    list_records = False
+    # select the list page and the total with COUNT(*) OVER(), MySQL 8.0+
+    list_total_window = False
+    # exact: COUNT on every list request
+    # cached: exact total kept in the app cache for count_cache_time
+    #   seconds, dropped on writes to the stream table
+    # estimated: EXPLAIN rows estimate when it is above
+    #   count_estimate_threshold, exact COUNT below it
+    count_strategy = 'exact'
+    count_strategies = ('exact', 'cached', 'estimated')
+    count_cache_time = 60
+    count_estimate_threshold = 100000
 
     ListForm = Form
     FilterForm = Form
@@ -98,32 +118,51 @@ class Stream(Base):
     def __init__(self, component):
         super().__init__(component)
         assert self.mapper_name
+        assert self.count_strategy in self.count_strategies, \
+            'Unknown count strategy "{}"'.format(self.count_strategy)
 
     @cached_property
     def mapper(self):
         mappers = self.component.app.db.mappers
         return mappers[self.db_id][self.mapper_name]
 
-    def get_list_form(self, env):
+    @cached_property
+    def list_form(self):
         class ListForm(self.ListForm):
             fields = self.list_fields
-        return ListForm(env=env, stream=self)
+        return ListForm(stream=self)
 
-    def get_filter_form(self, env):
+    @cached_property
+    def filter_form(self):
         class FilterForm(self.FilterForm):
             fields = self.filter_fields
-        return FilterForm(env=env, stream=self)
+        return FilterForm(stream=self)
 
-    def get_order_form(self, env):
+    @cached_property
+    def order_form(self):
         class ListForm(self.ListForm):
             fields = [f for f in self.list_fields if f.order]
-        return ListForm(env=env, stream=self)
+        return ListForm(stream=self)
 
-    def get_item_form(self, env, item=None, kwargs=None):
-        kwargs = kwargs or {}
+    @cached_property
+    def item_form(self):
         class ItemForm(self.ItemForm):
             fields = self.item_fields
-        return ItemForm(env=env, stream=self)
+        return ItemForm(stream=self)
+
+    # forms are built once per stream, requests get shallow copies bound
+    # to env
+    def get_list_form(self, env):
+        return self.list_form.bind(env=env)
+
+    def get_filter_form(self, env):
+        return self.filter_form.bind(env=env)
+
+    def get_order_form(self, env):
+        return self.order_form.bind(env=env)
+
+    def get_item_form(self, env, item=None, kwargs=None):
+        return self.item_form.bind(env=env)
 
     def query(self):
         return self.mapper.query()
@@ -155,13 +194,109 @@ class Stream(Base):
             page=None,
             page_size=None,
             keys=None,
+            after=None,
+            before=None,
     ):
 
         query = self.query()
         query = self._filter_query(env, query, filters)
         query = self._order_query(env, query, order)
-        query = self._page_query(env, query, page, page_size)
-        return await query.select_items(session, keys=keys)
+        query = self._page_query(env, query, page, page_size, after, before)
+        return await query.select_items(
+            session, keys=keys, records=self.list_records)
+
+    async def list_items_with_total(
+            self,
+            env,
+            session,
+            filters=None,
+            order=None,
+            page=None,
+            page_size=None,
+            keys=None,
+            after=None,
+            before=None,
+    ):
+        """ Returns items, total, the kind of the total (exact, cached or
+            estimated), and whether previous and next pages exist """
+        query = self.query()
+        query = self._filter_query(env, query, filters)
+        page_query = self._order_query(env, query, order)
+        # one more row tells whether there is another page
+        page_query = self._page_query(
+            env, page_query, page, page_size, after, before, lookahead=True)
+        total = total_kind = cache_key = None
+        if self.count_strategy == 'cached':
+            # the key is built before counting, a write committed meanwhile
+            # changes the version and the total is stored under the old one
+            cache_key = await self.get_total_cache_key(env, filters)
+            total = await self.get_cached_total(env, cache_key)
+            total_kind = 'cached'
+        # the window total of a keyset page counts rows past the cursor only,
+        # estimated totals are there to avoid scanning all rows
+        if total is None and self.list_total_window and \
+                self.count_strategy != 'estimated' and \
+                after is None and before is None:
+            items, total = await page_query.select_items_with_total(
+                session, keys=keys, records=self.list_records)
+            if total is None and page == 1:
+                total = 0
+            total_kind = 'exact'
+        else:
+            items = await page_query.select_items(
+                session, keys=keys, records=self.list_records)
+        if total is None:
+            total, total_kind = await self.count_total(env, session, query)
+        if cache_key is not None and total_kind == 'exact':
+            await self.set_cached_total(env, cache_key, total)
+        items, has_prev, has_next = self._trim_page(
+            items, page, page_size, after, before)
+        return items, total, total_kind, has_prev, has_next
+
+    async def count_total(self, env, session, query):
+        if self.count_strategy == 'estimated':
+            total = await query.estimate_count_items(session)
+            if total >= self.count_estimate_threshold:
+                return total, 'estimated'
+        return await query.count_items(session), 'exact'
+
+    @cached_property
+    def count_version_key(self):
+        return 'streams.count_version:{}.{}'.format(
+            self.mapper.db_id, self.mapper.table.name).encode()
+
+    async def get_total_cache_key(self, env, filters=None):
+        cache = getattr(self.component.app, 'cache', None)
+        if cache is None:
+            return None
+        # writes to the table change the version and orphan cached totals
+        version = await cache.get(self.count_version_key) or b'0'
+        filters = sorted((filters or {}).items())
+        digest = hashlib.md5(repr(filters).encode()).hexdigest()
+        return 'streams.total:{}:{}:{}'.format(
+            self.id, version.decode(), digest).encode()
+
+    async def get_cached_total(self, env, key):
+        if key is None:
+            return None
+        value = await self.component.app.cache.get(key)
+        return int(value) if value is not None else None
+
+    async def set_cached_total(self, env, key, total):
+        if key is None:
+            return
+        await self.component.app.cache.set(
+            key, str(total).encode(), expire=self.count_cache_time)
+
+    def get_cursors(self, env, items, order=None, has_prev=True,
+                    has_next=True):
+        if not items:
+            return None, None
+        query = self._order_query(env, self.query(), order)
+        return (
+            has_prev and query.cursor(items[0]) or None,
+            has_next and query.cursor(items[-1]) or None,
+        )
 
     async def count_items(self, env, session, filters=None):
         query = self.query()
@@ -173,24 +308,24 @@ class Stream(Base):
         return item_fields_form.get_initials(**kwargs)
 
     async def insert_item(self, env, session, item):
-        if 'id' in item:
-            if await self.is_item_exists(env, session, item['id']):
-                raise exceptions.StreamItemAlreadyExistsError(
-                    self.name,
-                    item['id'],
-                )
-        return await self.query().insert_item(session, item)
+        try:
+            return await self.query().insert_item(session, item)
+        except orm.exc.ItemAlreadyExistsError:
+            raise exceptions.StreamItemAlreadyExists(self.name, item['id'])
 
     async def update_item(self, env, session, item_id, values):
         keys = list(values.keys())
-        if not await self.is_item_exists(env, session, item_id):
+        try:
+            return await self.query().update_item(
+                session, item_id, values, keys)
+        except orm.exc.ItemNotFoundError:
             raise exceptions.StreamItemNotFoundError(self.name, item_id)
-        return await self.query().update_item(session, item_id, values, keys)
 
     async def delete_item(self, env, session, item_id):
-        if not await self.is_item_exists(env, session, item_id):
+        try:
+            return await self.query().delete_item(session, item_id)
+        except orm.exc.ItemNotFoundError:
             raise exceptions.StreamItemNotFoundError(self.name, item_id)
-        return await self.query().delete_item(session, item_id)
 
     async def check_perms(self, env, perms):
        return self.component.app.auth.check_perms(env.user, perms)
@@ -214,14 +349,31 @@ class Stream(Base):
             query = order_form[name].order(query, value)
         return query
 
-    def _page_query(self, env, query, page=1, page_size=1):
-        assert page > 0
+    def _page_query(self, env, query, page=1, page_size=1, after=None,
+                    before=None, lookahead=False):
         assert 0 < page_size <= self.max_limit
-        query = query.limit(page_size)
+        limit = lookahead and page_size + 1 or page_size
+        if after is not None:
+            return query.after(after).limit(limit)
+        if before is not None:
+            return query.before(before).limit(limit)
+        assert page > 0
+        # the same order as keyset pages, cursors of the page continue it
+        query = query.order_by(None).order_by(
+            *keyset.order_clauses(query.order_keys()))
+        query = query.limit(limit)
         if page != 1:
             query = query.offset((page-1)*page_size)
         return query
 
+    def _trim_page(self, items, page, page_size, after=None, before=None):
+        """ Drops the lookahead row, returns items, has_prev, has_next """
+        has_more = len(items) > page_size
+        if before is not None:
+            # items of a before page come in order, the extra one is first
+            return items[-page_size:], has_more, True
+        return items[:page_size], after is not None or page > 1, has_more
+
 
 class I18nMixin:
 
@@ -1,3 +1,11 @@
+class SlowClientError(Exception):
+    """ Client does not read its messages and is being disconnected """
+
+    def __init__(self, client_id):
+        super().__init__('Client {} is too slow'.format(client_id))
+        self.client_id = client_id
+
+
 class ServerBase:
     def serve_forever(self):
         raise NotImplementedError
@@ -5,9 +13,27 @@ class ServerBase:
     def get_remote_address(self, client_id):
         raise NotImplementedError
 
+    def get_subprotocol(self, client_id):
+        return None
+
+    def get_metrics(self):
+        return {}
+
     async def send(self, client_id, message):
         raise NotImplementedError
 
+    async def broadcast(self, client_ids, message, key=None):
+        """ Sends the same encoded message to clients, returns the number of
+            clients it was sent to """
+        sent = 0
+        for client_id in client_ids:
+            try:
+                await self.send(client_id, message)
+            except Exception:
+                continue
+            sent += 1
+        return sent
+
     async def recv(self, client_id):
         raise NotImplementedError
 
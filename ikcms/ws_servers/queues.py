@@ -0,0 +1,59 @@
+import asyncio
+from collections import deque
+
+
+__all__ = (
+    'SendQueue',
+)
+
+
+class SendQueue:
+    """ Bounded queue of outgoing messages of one client, a writer task
+        sends them while handlers go on """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        # [key, data] lists, key is None for messages never coalesced
+        self.messages = deque()
+        self.keys = {}
+        self.ready = asyncio.Event()
+        self.closed = False
+
+    def __len__(self):
+        return len(self.messages)
+
+    def full(self):
+        return len(self.messages) >= self.maxsize
+
+    def put(self, data, key=None):
+        # the sender decides what to do with a full queue
+        message = [key, data]
+        self.messages.append(message)
+        if key is not None:
+            self.keys[key] = message
+        self.ready.set()
+
+    def replace(self, data, key):
+        """ Replaces data of the queued message with the same key, returns
+            False if there is no such message """
+        message = self.keys.get(key)
+        if message is None:
+            return False
+        message[1] = data
+        return True
+
+    def close(self):
+        """ Queued messages are still returned, then get returns None """
+        self.closed = True
+        self.ready.set()
+
+    async def get(self):
+        while not self.messages:
+            if self.closed:
+                return None
+            self.ready.clear()
+            await self.ready.wait()
+        key, data = self.messages.popleft()
+        if key is not None:
+            del self.keys[key]
+        return data
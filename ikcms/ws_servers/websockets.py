@@ -1,9 +1,12 @@
+import os
 import asyncio
 import logging
 
 import websockets
 
 from .base import ServerBase
+from .base import SlowClientError
+from .queues import SendQueue
 
 
 logger = logging.getLogger(__name__)
@@ -11,28 +14,87 @@ logger = logging.getLogger(__name__)
 
 class WS_Server(ServerBase):
 
-    sockets = {}
-
-    def __init__(self, host, port, app):
+    # messages waiting to be sent to one client
+    send_queue_size = 256
+    # what happens to a broadcast message for a client whose send queue is
+    # full:
+    #   drop - the message is dropped
+    #   coalesce - messages sent with a key replace the queued message with
+    #       the same key, other messages are dropped when the queue is full
+    #   disconnect - the client is disconnected
+    # responses are never dropped or coalesced. With drop and coalesce they
+    # may take one more send_queue_size of room, then the client is
+    # disconnected
+    slow_client_policies = ('drop', 'coalesce', 'disconnect')
+    slow_client_policy = 'disconnect'
+    # seconds given to the writer to send queued messages of a finished
+    # client
+    flush_timeout = 5
+
+    def __init__(self, host, port, app, reuse_port=False, worker_id=None,
+                 metrics_interval=None, send_queue_size=None,
+                 slow_client_policy=None):
         self.host = host
         self.port = port
         self.app = app
+        # several worker processes listen on the same port
+        self.reuse_port = reuse_port
+        self.worker_id = worker_id
+        self.metrics_interval = metrics_interval
+        self.send_queue_size = send_queue_size or self.send_queue_size
+        self.slow_client_policy = slow_client_policy or self.slow_client_policy
+        assert self.slow_client_policy in self.slow_client_policies, \
+            'Unknown slow client policy "{}"'.format(self.slow_client_policy)
+        # websockets live in the process that accepted them
+        self.sockets = {}
+        self.queues = {}
+        self.connections = 0
+        self.received = 0
+        self.sent = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
 
     def serve_forever(self):
+        loop = asyncio.get_event_loop()
         start_server = websockets.serve(
             self._new_client,
             self.host,
             self.port,
+            subprotocols=getattr(self.app, 'subprotocol_names', None),
+            reuse_port=self.reuse_port or None,
         )
-        asyncio.get_event_loop().run_until_complete(start_server)
-        asyncio.get_event_loop().run_forever()
+        loop.run_until_complete(start_server)
+        if self.metrics_interval:
+            asyncio.ensure_future(self.report_metrics())
+        loop.run_forever()
+
+    def get_metrics(self):
+        return {
+            'worker': self.worker_id,
+            'pid': os.getpid(),
+            'clients': len(self.sockets),
+            'connections': self.connections,
+            'received': self.received,
+            'sent': self.sent,
+            'queued': sum(len(queue) for queue in self.queues.values()),
+            'dropped': self.dropped,
+            'slow_disconnects': self.slow_disconnects,
+        }
+
+    async def report_metrics(self):
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            logger.info('Worker %s metrics: %s',
+                        self.worker_id, self.get_metrics())
 
     async def _new_client(self, websocket, path):
         logger.debug('Connected client %s', websocket.remote_address)
 
         client_id = self.client_id(websocket)
         self.sockets[client_id] = websocket
-        logger.debug('Connected client %s', websocket.remote_address)
+        queue = self.queues[client_id] = SendQueue(self.send_queue_size)
+        writer = asyncio.ensure_future(self._write(websocket, queue))
+        self.connections += 1
         try:
             await self.app(self, client_id)
         except websockets.exceptions.ConnectionClosed:
@@ -40,25 +102,94 @@ class WS_Server(ServerBase):
         except:
             await self.disconnect(client_id, 500, 'Internal server error')
             raise
+        finally:
+            # responses still queued are sent before the socket is dropped
+            queue.close()
+            try:
+                await asyncio.wait_for(writer, self.flush_timeout)
+            except asyncio.TimeoutError:
+                logger.debug('Dropped unsent messages of client %s',
+                             client_id)
+            self.sockets.pop(client_id, None)
+            self.queues.pop(client_id, None)
+
+    async def _write(self, websocket, queue):
+        while True:
+            data = await queue.get()
+            if data is None:
+                break
+            try:
+                await websocket.send(data)
+            except websockets.exceptions.ConnectionClosed:
+                break
+            self.sent += 1
 
     def client_id(self, websocket):
-        return websocket.__repr__()
+        # unique across worker processes, forked workers may have
+        # websockets at the same address
+        return '{}.{!r}'.format(os.getpid(), websocket)
 
     def get_remote_address(self, client_id):
         return self.sockets[client_id].remote_address
 
+    def get_subprotocol(self, client_id):
+        return self.sockets[client_id].subprotocol
+
     async def send(self, client_id, data):
-        return await self.sockets[client_id].send(data)
+        """ Queues a response for the client, a slow client never blocks
+            the sender """
+        queue = self.queues[client_id]
+        limit = self.send_queue_size
+        if self.slow_client_policy != 'disconnect':
+            limit *= 2
+        if len(queue) >= limit:
+            self._disconnect_slow(client_id)
+        queue.put(data)
+
+    async def broadcast(self, client_ids, data, key=None):
+        sent = 0
+        for client_id in client_ids:
+            try:
+                sent += self._enqueue(client_id, data, key)
+            except (KeyError, SlowClientError):
+                continue
+        return sent
+
+    def _enqueue(self, client_id, data, key=None):
+        """ Queues an unsolicited message following the slow client
+            policy, returns False if the message was dropped """
+        queue = self.queues[client_id]
+        if self.slow_client_policy != 'coalesce':
+            key = None
+        elif key is not None and queue.replace(data, key):
+            return True
+        if not queue.full():
+            queue.put(data, key)
+            return True
+        if self.slow_client_policy == 'disconnect':
+            self._disconnect_slow(client_id)
+        self.dropped += 1
+        logger.debug('Dropped message to slow client %s', client_id)
+        return False
+
+    def _disconnect_slow(self, client_id):
+        self.slow_disconnects += 1
+        self.queues.pop(client_id)
+        asyncio.ensure_future(
+            self.disconnect(client_id, 1008, 'Client is too slow'))
+        raise SlowClientError(client_id)
 
     async def recv(self, client_id):
-        return await self.sockets[client_id].recv()
+        data = await self.sockets[client_id].recv()
+        self.received += 1
+        return data
 
     async def disconnect(self, client_id, code=1000, reason=''):
-        address = self.get_remote_address(client_id)
-        await self.sockets[client_id].close(code, reason)
-        del self.sockets[client_id]
-        logger.debug('Disconnected client %s', address)
+        websocket = self.sockets.pop(client_id, None)
+        if websocket is None:
+            return
+        await websocket.close(code, reason)
+        logger.debug('Disconnected client %s', websocket.remote_address)
 
     async def ping(self, client_id):
         return self.sockets[client_id].ping()
-
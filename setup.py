@@ -48,6 +48,7 @@ setup(
         'aiomcache': ['aiomcache'],
         'redis': ['redis'],
         'aioredis': ['aioredis'],
+        'msgpack': ['msgpack'],
     },
     package_data={'ikcms': [
         'ikinit/templates/*/*.j2',
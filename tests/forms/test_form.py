@@ -1,5 +1,134 @@
 from unittest import TestCase
+from datetime import date
+
+from ikcms.forms import Form
+from ikcms.forms import fields
+from ikcms.forms import exceptions
+from ikcms.utils.records import record_class
 
 
 class FormTestCase(TestCase):
-    pass
+
+    def test_from_python_record(self):
+        class id_field(fields.Int):
+            name = 'id'
+
+        class title_field(fields.String):
+            name = 'title'
+
+        class form_cls(Form):
+            fields = [id_field, title_field]
+
+        form = form_cls()
+        Record = record_class('TestRecord', ('id', 'title', 'date'))
+        values = [Record(1, 'first', None), Record(2, 'second', None)]
+        self.assertEqual(form.values_from_python(values), [
+            {'id': 1, 'title': 'first'},
+            {'id': 2, 'title': 'second'},
+        ])
+        self.assertEqual(values[0], {'id': 1, 'title': 'first', 'date': None})
+        self.assertEqual(Record(3).keys(), ['id'])
+        self.assertNotIn('title', Record(3))
+
+    def test_bind(self):
+        class title_field(fields.String):
+            name = 'title'
+
+        class form_cls(Form):
+            fields = [title_field]
+
+        form = form_cls(stream='stream')
+        bound = form.bind(env='env')
+        self.assertIsInstance(bound, form_cls)
+        self.assertIs(bound['title'], form['title'])
+        self.assertEqual(bound.context['env'], 'env')
+        self.assertEqual(bound.context['stream'], 'stream')
+        self.assertNotIn('env', form.context)
+        self.assertEqual(bound.get_cfg(), form.get_cfg())
+
+        cfg = bound.get_cfg()
+        cfg[0]['name'] = 'changed'
+        cfg.append({})
+        self.assertEqual(form.get_cfg(), [form['title'].widget.to_dict(
+            form['title'])])
+
+
+class FormPipelineTestCase(TestCase):
+
+    fields_count = 30
+    rows_count = 30
+
+    def setUp(self):
+        field_classes = [fields.String, fields.Int, fields.Date]
+        form_fields = []
+        for num in range(self.fields_count):
+            field_cls = field_classes[num % len(field_classes)]
+            form_fields.append(type('field{}'.format(num), (field_cls,), {
+                'name': 'field{}'.format(num),
+                'required': num % 2 == 0,
+                'raw_required': num != 3,
+                'min_value': 0,
+            }))
+        self.form = type('BenchmarkForm', (Form,), {'fields': form_fields})()
+        self.python_rows = []
+        for row in range(self.rows_count):
+            python_row = {}
+            for num, field in enumerate(self.form.values()):
+                if isinstance(field, fields.Int):
+                    python_row[field.name] = row * num
+                elif isinstance(field, fields.Date):
+                    python_row[field.name] = date(2000 + num, 1, 1 + row % 28)
+                else:
+                    python_row[field.name] = 'value {} {}'.format(row, num)
+            self.python_rows.append(python_row)
+        self.raw_rows = [self.walk_from_python(row) for row in self.python_rows]
+        # validation errors and not required raw value
+        self.raw_rows[1]['field0'] = ''
+        self.raw_rows[2]['field1'] = -1
+        del self.raw_rows[3]['field3']
+
+    # field by field implementation the pipeline replaces
+    def walk_to_python(self, raw_dict):
+        python_dict = {}
+        errors = {}
+        for name, field in self.form.items():
+            try:
+                python_dict.update(field.to_python(raw_dict))
+            except exceptions.ValidationError as exc:
+                errors.update(exc.kwargs['error'])
+        return python_dict, errors
+
+    def walk_from_python(self, python_dict):
+        raw_dict = {}
+        for name, field in self.form.items():
+            raw_dict.update(field.from_python(python_dict))
+        return raw_dict
+
+    def test_from_python(self):
+        self.assertEqual(
+            self.form.values_from_python(self.python_rows),
+            [self.walk_from_python(row) for row in self.python_rows],
+        )
+
+    def test_to_python(self):
+        result = self.form.values_to_python(self.raw_rows)
+        self.assertEqual(
+            result, [self.walk_to_python(row) for row in self.raw_rows])
+        self.assertEqual(result[1][1], {'field0': 'required field'})
+        self.assertEqual(result[2][1], {'field1': 'min value is 0'})
+        self.assertEqual(result[3], ({
+            key: value for key, value in self.python_rows[3].items() \
+            if key != 'field3'
+        }, {}))
+
+    def test_errors(self):
+        python_row = dict(self.python_rows[0], field0=None)
+        with self.assertRaises(exceptions.PythonValueNoneNotAllowedError):
+            self.form.from_python(python_row)
+        del python_row['field0']
+        with self.assertRaises(exceptions.PythonValueRequiredError):
+            self.form.from_python(python_row)
+        raw_row = dict(self.raw_rows[0])
+        del raw_row['field0']
+        with self.assertRaises(exceptions.RawValueRequiredError):
+            self.form.to_python(raw_row)
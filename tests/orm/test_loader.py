@@ -0,0 +1,57 @@
+import asyncio
+from unittest import TestCase
+
+import sqlalchemy as sa
+
+from ikcms.utils.asynctests import asynctest
+from ikcms import orm
+from ikcms.orm.loader import Loader
+
+
+class _Loader(Loader):
+
+    def __init__(self):
+        super().__init__(None)
+        self.calls = []
+
+    async def select_items(self, query, ids, keys):
+        self.calls.append(sorted(ids))
+        return [{'id': id, 'title': str(id)} for id in ids]
+
+
+class LoaderTestCase(TestCase):
+
+    class MapperClass(orm.mappers.Pub):
+
+        name = 'Test'
+
+        def create_columns(self):
+            return [sa.Column('title', sa.String(255))]
+
+    def setUp(self):
+        registry = orm.mappers.Registry.from_db_ids(['admin', 'front'])
+        self.MapperClass.create(registry)
+        registry.create_schema()
+        self.mapper = registry['front']['Test']
+
+    @asynctest
+    async def test_equal_filters(self):
+        loader = _Loader()
+        # every caller builds its own public query
+        results = await asyncio.gather(
+            loader.load(self.mapper.public_query(), [1, 2]),
+            loader.load(self.mapper.public_query(), [2, 3]),
+        )
+        self.assertEqual(loader.calls, [[1, 2, 3]])
+        self.assertEqual(sorted(results[0]), [1, 2])
+        self.assertEqual(sorted(results[1]), [2, 3])
+
+    @asynctest
+    async def test_different_filters(self):
+        loader = _Loader()
+        await asyncio.gather(
+            loader.load(self.mapper.public_query(), [1]),
+            loader.load(self.mapper.private_query(), [2]),
+            loader.load(self.mapper.query(), [3]),
+        )
+        self.assertEqual(sorted(loader.calls), [[1], [2], [3]])
@@ -1,3 +1,4 @@
+import asyncio
 from unittest import TestCase
 from unittest import skipIf
 from datetime import date
@@ -190,6 +191,193 @@ class BaseMapperTestCase(TestBase, TestCase):
             self.assertEqual(items, [])
             await db_state.assert_state(self, session)
 
+    @asynctest
+    async def test_select_ordered(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['full']
+        query = mapper.query().order_by(mapper.c['date'].desc())
+        async with await db() as session:
+            await db_state.syncdb(session)
+            item1 = db_state['Test'][1]
+            item3 = db_state['Test'][3]
+            item4 = db_state['Test'][4]
+            items = await query.limit(2).select_items(session)
+            self.assertEqual(items, [item4, item3])
+            items = await query.limit(2).offset(1).select_items(
+                session, keys=['date'])
+            self.assertEqual(items, [
+                {'id': item3['id'], 'date': item3['date']},
+                {'id': item1['id'], 'date': item1['date']},
+            ])
+            await db_state.assert_state(self, session)
+
+    @asynctest
+    async def test_select_records(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['full']
+        query = mapper.query().order_by(mapper.c['id'])
+        async with await db() as session:
+            await db_state.syncdb(session)
+            item2 = db_state['Test'][2]
+            item4 = db_state['Test'][4]
+            items = await query.id(2, 4).select_items(session, records=True)
+            self.assertEqual(items, [item2, item4])
+            self.assertIsInstance(items[0], mapper.record_class(item2))
+            self.assertFalse(hasattr(items[0], '__dict__'))
+            items = await query.id(2, 4).select_items(
+                session, keys=['title'], records=True)
+            self.assertEqual([item['title'] for item in items],
+                             [item2['title'], item4['title']])
+            self.assertEqual(items[1].to_dict(),
+                             {'id': item4['id'], 'title': item4['title']})
+            await db_state.assert_state(self, session)
+
+    @asynctest
+    async def test_select_keyset(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['full']
+        query = mapper.query().order_by(mapper.c['date'].desc())
+        async with await db() as session:
+            await db_state.syncdb(session)
+            item1 = db_state['Test'][1]
+            item2 = db_state['Test'][2]
+            item3 = db_state['Test'][3]
+            item4 = db_state['Test'][4]
+            cursor = query.cursor(item3)
+            items = await query.after(cursor).limit(1).select_items(session)
+            self.assertEqual(items, [item1])
+            items = await query.after(cursor).select_items(session)
+            self.assertEqual(items, [item1, item2])
+            items = await query.before(cursor).select_items(session)
+            self.assertEqual(items, [item4])
+            items = await query.before(query.cursor(item2)).limit(2) \
+                .select_items(session)
+            self.assertEqual(items, [item3, item1])
+            with self.assertRaises(exc.CursorError):
+                query.after('invalid')
+            await db_state.assert_state(self, session)
+
+    @asynctest
+    async def test_iter_items(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['full']
+        async with await db() as session:
+            await db_state.syncdb(session)
+            items = db_state['Test']
+            query = mapper.query()
+            result = [item async for item in query.iter_items(
+                session, chunk_size=3)]
+            self.assertEqual(result, [items[1], items[2], items[3], items[4]])
+            query = mapper.query().order_by(mapper.c['date'].desc())
+            result = [item async for item in query.iter_items(
+                session, keys=['title'], chunk_size=2)]
+            self.assertEqual(result, [
+                {'id': item['id'], 'title': item['title']} \
+                for item in [items[4], items[3], items[1], items[2]]
+            ])
+            await db_state.assert_state(self, session)
+
+    @asynctest
+    async def test_iter_items_identity_map(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['full']
+        async with await db(identity_map=True) as session:
+            await db_state.syncdb(session)
+            result = [item async for item in mapper.query().iter_items(
+                session, chunk_size=3)]
+            self.assertEqual(len(result), 4)
+            # iterated items are not kept by the session
+            self.assertEqual(len(session.identity_map), 0)
+
+    @asynctest
+    async def test_iter_items_ties(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['empty'].copy()
+        dates = [None, date(2005, 4, 20), date(2005, 4, 20), None,
+                 date(2016, 12, 12), date(2005, 4, 20), None]
+        db_state['Test'].set_state([
+            dict(self.random_item(num + 1), date=value) \
+            for num, value in enumerate(dates)
+        ])
+        # NULLs sort as the smallest values, ties go by id
+        items = sorted(db_state['Test'].get_state(),
+                       key=lambda item: item['id'])
+        date_key = lambda item: (item['date'] is not None,
+                                 item['date'] or date.min)
+        async with await db() as session:
+            await db_state.syncdb(session)
+            for desc in [False, True]:
+                column = mapper.c['date']
+                query = mapper.query().order_by(
+                    desc and column.desc() or column)
+                result = [item async for item in query.iter_items(
+                    session, keys=['date'], chunk_size=2)]
+                self.assertEqual(
+                    [item['id'] for item in result],
+                    [item['id'] for item in sorted(
+                        items, key=date_key, reverse=desc)],
+                )
+            await db_state.assert_state(self, session)
+
+    @asynctest
+    async def test_fill(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['full']
+        query = mapper.query()
+        async with await db() as session:
+            await db_state.syncdb(session)
+            items = db_state['Test']
+            data1 = {'item': 1, 'items': [3, 2]}
+            data2 = [{'item': 2}, {'item': 4}]
+            await asyncio.gather(
+                query.fill(session, data1, 'item', 'items',
+                           loader=session.loader),
+                query.fill(session, data2, 'item', loader=session.loader),
+            )
+            self.assertEqual(data1, {
+                'item': items[1],
+                'items': [items[3], items[2]],
+            })
+            self.assertEqual(data2, [{'item': items[2]}, {'item': items[4]}])
+            data3 = {'items': [4]}
+            await query.fill(session, data3, 'items')
+            self.assertEqual(data3, {'items': [items[4]]})
+            await db_state.assert_state(self, session)
+
+    @asynctest
+    async def test_identity_map(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['full']
+        query = mapper.query().order_by(mapper.c['id'])
+        keys = mapper.table_keys.union(mapper.relation_keys)
+        async with await db(identity_map=True) as session:
+            await db_state.syncdb(session)
+            item2 = db_state['Test'][2]
+            # items with relation keys are loaded by ids with _load_items,
+            # the only path reading the identity map
+            queries = len(session.stats.records)
+            items = await mapper._load_items(session, [2], keys)
+            self.assertEqual(items, [item2])
+            self.assertEqual(len(session.stats.records), queries + 1)
+            self.assertIn(('admin.Test', 2), session.identity_map)
+            items[0]['title'] = 'changed'
+            items = await mapper._load_items(session, [2], keys)
+            self.assertEqual(items, [item2])
+            self.assertEqual(len(session.stats.records), queries + 1)
+
+            await query.update_item(session, 2, {'title': 'updated'})
+            item2['title'] = 'updated'
+            self.assertNotIn(('admin.Test', 2), session.identity_map)
+            queries = len(session.stats.records)
+            items = await mapper._load_items(session, [2], keys)
+            self.assertEqual(items, [item2])
+            self.assertEqual(len(session.stats.records), queries + 1)
+
+            await query.delete_item(session, 2)
+            self.assertNotIn(('admin.Test', 2), session.identity_map)
+            items = await query.id(2).select_items(session)
+            self.assertEqual(items, [])
+
     @asynctest
     async def test_insert(self, db, db_states):
         mapper = db.mappers['admin']['Test']
@@ -222,6 +410,47 @@ class BaseMapperTestCase(TestBase, TestCase):
                 await mapper.insert_item(session, item3)
             await db_state.assert_state(self, session)
 
+    @asynctest
+    async def test_insert_items(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['empty']
+        query = mapper.query().order_by(mapper.c['id'])
+        mapper.insert_chunk_size = 3
+        async with await db() as session:
+            await db_state.syncdb(session)
+            items = self.create_test_items()
+            ids = await query.insert_items(
+                session,
+                [dict(item, id=None) for item in items],
+            )
+            self.assertEqual(ids, [item['id'] for item in items])
+            db_state['Test'].set_state(items)
+            await db_state.assert_state(self, session)
+
+            item5 = dict(self.random_item(5), title2=None, date=None)
+            item7 = dict(self.random_item(7), title2=None, date=None)
+            ids = await query.insert_items(
+                session, [item7, item5], keys=['id', 'title'])
+            self.assertEqual(ids, [7, 5])
+            db_state['Test'].append(item5)
+            db_state['Test'].append(item7)
+            await db_state.assert_state(self, session)
+
+            with self.assertRaises(exc.IntegrityError):
+                await query.insert_items(session, [item5])
+            await db_state.assert_state(self, session)
+
+            # supplied ids are inserted even if keys do not list id, the
+            # others are generated after them
+            item9 = dict(self.random_item(9), title2=None, date=None)
+            item10 = dict(self.random_item(10), title2=None, date=None)
+            ids = await query.insert_items(
+                session, [dict(item10, id=None), item9], keys=['title'])
+            self.assertEqual(ids, [10, 9])
+            db_state['Test'].append(item9)
+            db_state['Test'].append(item10)
+            await db_state.assert_state(self, session)
+
     @asynctest
     async def test_update(self, db, db_states):
         mapper = db.mappers['admin']['Test']
@@ -260,6 +489,39 @@ class BaseMapperTestCase(TestBase, TestCase):
                 self.assertEqual(e.args[0], 4)
             await db_state.assert_state(self, session)
 
+            # unchanged values still match the row
+            query = mapper.query()
+            await query.update_item(session, 4, {'title2': 'updated2'})
+            with self.assertRaises(exc.ItemNotFoundError):
+                await query.update_item(session, 44, {'title2': 'updated2'})
+            await db_state.assert_state(self, session)
+
+    @asynctest
+    async def test_upsert(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        query = mapper.query()
+        db_state = db_states['full']
+        async with await db() as session:
+            await db_state.syncdb(session)
+            item = await query.upsert_item(
+                session, dict(db_state['Test'][2], title='upserted'))
+            db_state['Test'][2]['title'] = 'upserted'
+            self.assertEqual(item, db_state['Test'][2])
+            await db_state.assert_state(self, session)
+
+            item = await query.upsert_item(session, self.random_item(5))
+            db_state['Test'].append(item)
+            await db_state.assert_state(self, session)
+
+            # existing rows keep the columns not listed in update_keys
+            values = dict(db_state['Test'][2], title='new', title2='new')
+            await query.upsert_item(session, values, update_keys=['title'])
+            db_state['Test'][2]['title'] = 'new'
+            await db_state.assert_state(self, session)
+
+            with self.assertRaises(exc.ItemAlreadyExistsError):
+                await query.insert_item(session, db_state['Test'][5])
+
     @asynctest
     async def test_delete(self, db, db_states):
         mapper = db.mappers['admin']['Test']
@@ -296,6 +558,34 @@ class BaseMapperTestCase(TestBase, TestCase):
             self.assertEqual(result, 1)
             await db_states['full'].assert_state(self, session)
 
+    @asynctest
+    async def test_select_items_with_total(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        db_state = db_states['full']
+        query = mapper.query().order_by(mapper.c['id'])
+        async with await db() as session:
+            await db_state.syncdb(session)
+            item3 = db_state['Test'][3]
+            items, total = await query.limit(1).offset(2) \
+                .select_items_with_total(session, keys=['title'])
+            self.assertEqual(items, [{'id': 3, 'title': item3['title']}])
+            self.assertEqual(total, len(db_state['Test'].keys()))
+            items, total = await query.limit(1).offset(10) \
+                .select_items_with_total(session)
+            self.assertEqual((items, total), ([], None))
+            await db_state.assert_state(self, session)
+
+    @asynctest
+    async def test_estimate_count(self, db, db_states):
+        mapper = db.mappers['admin']['Test']
+        query = mapper.query()
+        async with await db() as session:
+            await db_states['full'].syncdb(session)
+            result = await query.estimate_count_items(session)
+            self.assertIsInstance(result, int)
+            self.assertGreaterEqual(result, 0)
+            await db_states['full'].assert_state(self, session)
+
 
 @skipIf(not cfg.AIO_DB_ENABLED, 'AIO DB DISABLED')
 class I18nMapperTestCase(TestBase, TestCase):
@@ -403,6 +693,26 @@ class I18nMapperTestCase(TestBase, TestCase):
             await db_state.assert_state(self, session)
 
 
+    @asynctest
+    async def test_insert_items(self, db, db_states):
+        mapper_en = db.mappers['admin']['en']['Test']
+        query_en = mapper_en.query().order_by(mapper_en.c['id'])
+
+        db_state = db_states['empty']
+        test_items = self.create_test_items()
+        async with await db() as session:
+            await db_state.syncdb(session)
+            ids = await query_en.insert_items(
+                session,
+                [dict(item, id=None) for item in test_items],
+            )
+            self.assertEqual(ids, [item['id'] for item in test_items])
+            for item in test_items:
+                db_state['TestEn'].append(dict(item, state='normal'))
+                db_state['TestRu'].append(
+                    dict(item, state='absent', date=None, title2=None))
+            await db_state.assert_state(self, session)
+
     @asynctest
     async def test_create_i18n_version(self, db, db_states):
         mapper_ru = db.mappers['admin']['ru']['Test']
@@ -628,6 +938,37 @@ class PubMapperTestCase(TestBase, TestCase):
                     await query2.insert_item(session, item)
                 await db_state.assert_state(self, session)
 
+    @asynctest
+    async def test_insert_items(self, db, db_states):
+        mapper1 = db.mappers['admin']['Test']
+        mapper2 = db.mappers['front']['Test']
+        query1 = mapper1.query().order_by(mapper1.c['id'])
+        query2 = mapper2.query().order_by(mapper2.c['id'])
+
+        test_items = self.create_test_items()
+        async with await db() as session:
+            db_state = db_states['empty'].copy()
+            await db_state.syncdb(session)
+            ids = await query1.insert_items(
+                session,
+                [dict(item, id=None) for item in test_items],
+            )
+            self.assertEqual(ids, [item['id'] for item in test_items])
+            for item in test_items:
+                db_state['TestAdmin'].append(dict(item, state='private'))
+                db_state['TestFront'].append(dict(
+                    item,
+                    state='private',
+                    title=None,
+                    title2=None,
+                    date=None,
+                ))
+            await db_state.assert_state(self, session)
+
+            with self.assertRaises(AssertionError):
+                await query2.insert_items(session, test_items)
+            await db_state.assert_state(self, session)
+
     @asynctest
     async def test_delete_item(self, db, db_states):
         mapper1 = db.mappers['admin']['Test']
@@ -682,6 +1023,38 @@ class PubMapperTestCase(TestBase, TestCase):
                     await query2.publish(session, front_item['id'])
                 await db_state.assert_state(self, session)
 
+    @asynctest
+    async def test_publish_items(self, db, db_states):
+        mapper1 = db.mappers['admin']['Test']
+        mapper2 = db.mappers['front']['Test']
+        query1 = mapper1.query()
+        query2 = mapper2.query()
+
+        db_state = db_states['full']
+        for front_item in db_state['TestFront'].values():
+            front_item['title'] = 'different title'
+        async with await db() as session:
+            await db_state.syncdb(session)
+            ids = [item['id'] for item in db_state['TestAdmin'].values()]
+            private_ids = [item['id'] for item in db_state['TestAdmin'].values()
+                           if item['state'] == 'private']
+            published = await query1.publish_items(session, ids)
+            self.assertEqual(sorted(published), sorted(private_ids))
+            for id in private_ids:
+                admin_item = db_state['TestAdmin'][id]
+                admin_item['state'] = 'public'
+                db_state['TestFront'][id].update(admin_item)
+            await db_state.assert_state(self, session)
+
+            unpublished = await query1.unpublish_items(session, private_ids)
+            self.assertEqual(sorted(unpublished), sorted(private_ids))
+            for id in private_ids:
+                db_state['TestAdmin'][id]['state'] = 'private'
+                db_state['TestFront'][id]['state'] = 'private'
+            await db_state.assert_state(self, session)
+            with self.assertRaises(AssertionError):
+                await query2.publish_items(session, ids)
+
 
 @skipIf(not cfg.AIO_DB_ENABLED, 'AIO DB DISABLED')
 @skipIf(not (DB_URL1 and DB_URL2), 'db url or db url2 undefined')
@@ -1025,3 +1398,25 @@ class I18nPubMapperTestCase(TestBase, TestCase):
                     await query_front_ru.publish(session, id)
                 await db_state.assert_state(self, session)
 
+    @asynctest
+    async def test_publish_items(self, db, db_states):
+        mapper_admin_ru = db.mappers['admin']['ru']['Test']
+        query_admin_ru = mapper_admin_ru.query()
+
+        db_state = db_states['full']
+        async with await db() as session:
+            await db_state.syncdb(session)
+            ids = list(db_state['TestAdminRu'].keys())
+            published = await query_admin_ru.publish_items(session, ids)
+            private_ids = []
+            for id in ids:
+                admin_ru_item = db_state['TestAdminRu'][id]
+                if admin_ru_item['state'] == 'private':
+                    private_ids.append(id)
+                    admin_ru_item['state'] = 'public'
+                    db_state['TestFrontRu'][id].update(admin_ru_item)
+                    db_state['TestFrontEn'][id]['title'] = \
+                        admin_ru_item['title']
+            self.assertEqual(sorted(published), sorted(private_ids))
+            await db_state.assert_state(self, session)
+
@@ -126,6 +126,44 @@ class M2MRelationTestCase(TestCase):
             await state2.assert_state(self, session)
 
 
+    @asynctest
+    async def test_update(self, db, local_mapper, remote_mapper, state1, state2):
+        async with await db() as session:
+            await state2.syncdb(session)
+            await local_mapper.query().update_item(
+                session,
+                1,
+                {'title': 'title1', 'm2m': [3, 1], 'm2m_ordered': [3, 2, 1]},
+            )
+            del state2['m2m'][(1, 2)]
+            state2['m2m_ordered'][(1, 1)]['order'] = 3
+            state2['m2m_ordered'][(1, 2)]['order'] = 2
+            state2['m2m_ordered'][(1, 3)]['order'] = 1
+            await state2.assert_state(self, session)
+
+            await local_mapper.relations['m2m_ordered'].store(
+                session, 1, [2], replace=True)
+            state2['m2m_ordered'].set_state(
+                [{'local_id': 1, 'remote_id': 2, 'order': 1}])
+            await state2.assert_state(self, session)
+
+    @asynctest
+    async def test_insert_items(
+            self, db, local_mapper, remote_mapper, state1, state2):
+        async with await db() as session:
+            await state1.syncdb(session)
+            ids = await local_mapper.query().insert_items(
+                session,
+                [{
+                    'id': 1,
+                    'title': 'title1',
+                    'm2m': [1, 2, 3],
+                    'm2m_ordered': [2, 1, 3],
+                }],
+            )
+            self.assertEqual(ids, [1])
+            await state2.assert_state(self, session)
+
     @asynctest
     async def test_load(self, db, local_mapper, remote_mapper, state1, state2):
         async with await db() as session:
@@ -1,9 +1,18 @@
+import asyncio
 from unittest import TestCase, skipIf
+from unittest.mock import MagicMock
 
+import sqlalchemy as sa
 from sqlalchemy import sql
+from sqlalchemy.dialects.mysql.pymysql import MySQLDialect_pymysql
 from ikcms.utils.asynctests import asynctest
 from ikcms.ws_components.db import Component
+from ikcms import orm
+from ikcms.orm import relations
 from ikcms.orm.session import Session
+from ikcms.orm.replicas import ReplicaPool
+from ikcms.orm.instrumentation import Instrumentation
+from ikcms.orm.instrumentation import request_stats
 from ikcms.orm import exc
 
 from tests.cfg import cfg
@@ -187,6 +196,400 @@ class _SessionTestCaseBase(TestCase):
             self.assertEqual(rows.rowcount, 1)
 
 
+class _Transaction:
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def commit(self):
+        if self.engine.fail:
+            raise RuntimeError(self.engine.name)
+        self.engine.log.append('commit')
+
+    async def rollback(self):
+        await asyncio.sleep(self.engine.rollback_delay)
+        if self.engine.rollback_fail:
+            raise RuntimeError(self.engine.name)
+        self.engine.log.append('rollback')
+
+
+class _Connection:
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def begin(self):
+        self.engine.log.append('begin')
+        return _Transaction(self.engine)
+
+    async def execute_compiled(self, compiled, params):
+        self.engine.log.append('execute')
+        rows = self.engine.results and self.engine.results.pop(0) or []
+        result = MagicMock(rowcount=len(rows) or 1)
+        result.__iter__.return_value = iter(rows)
+        return result
+
+
+class _Engine:
+
+    dialect = MySQLDialect_pymysql(paramstyle='pyformat')
+
+    def __init__(self, name, fail=False, rollback_fail=False,
+                 rollback_delay=0, results=None):
+        self.name = name
+        # rows returned by the next executed statements
+        self.results = list(results or [])
+        self.fail = fail
+        self.rollback_fail = rollback_fail
+        self.rollback_delay = rollback_delay
+        self.log = []
+
+    async def acquire(self):
+        return _Connection(self)
+
+    def release(self, conn):
+        self.log.append('release')
+
+
+class _SAConnection(_Connection):
+    """ Connection of a driver without execute_compiled """
+
+    execute_compiled = None
+
+    async def execute(self, query, params):
+        self.engine.log.append(('execute', query, params))
+        return MagicMock(rowcount=1)
+
+
+class _SAEngine(_Engine):
+
+    async def acquire(self):
+        return _SAConnection(self)
+
+
+class SessionExecuteTestCase(TestCase):
+
+    @asynctest
+    async def test_execute_fallback(self):
+        table = sa.Table(
+            'Test',
+            sa.MetaData(),
+            sa.Column('id', sa.Integer, primary_key=True),
+        )
+        engine = _SAEngine('db')
+        session = Session({'db': engine}, {table: engine})
+        query = sql.select([table.c.id]) \
+            .where(table.c.id == sa.bindparam('id'))
+        await session.execute(query, {'id': 1})
+        self.assertEqual(engine.log, [('execute', query, {'id': 1})])
+        self.assertEqual(len(session.stats.records), 1)
+        await session.close()
+
+
+class SessionCommitTestCase(TestCase):
+
+    def create_session(self, engines, **kwargs):
+        metadata = sa.MetaData()
+        self.tables = {
+            db_id: sa.Table(
+                db_id,
+                metadata,
+                sa.Column('id', sa.Integer, primary_key=True),
+            ) for db_id in engines
+        }
+        binds = {self.tables[db_id]: engine \
+                 for db_id, engine in engines.items()}
+        return Session(engines, binds, **kwargs)
+
+    @asynctest
+    async def test_commit_error(self):
+        engines = {
+            'admin': _Engine('admin'),
+            'front': _Engine('front', fail=True),
+        }
+        session = self.create_session(engines)
+        with self.assertRaises(exc.CommitError) as e:
+            async with session:
+                for table in self.tables.values():
+                    await session.execute(sql.delete(table))
+        self.assertEqual(e.exception.committed, ['admin'])
+        self.assertEqual(list(e.exception.errors), ['front'])
+        self.assertEqual(
+            engines['admin'].log, ['begin', 'execute', 'commit', 'release'])
+        self.assertEqual(
+            engines['front'].log, ['begin', 'execute', 'rollback', 'release'])
+
+    @asynctest
+    async def test_commit_rollback(self):
+        engines = {
+            'admin': _Engine('admin'),
+            'front': _Engine('front'),
+        }
+        session = self.create_session(engines)
+        for table in self.tables.values():
+            await session.execute(sql.select([table.c.id]))
+            await session.execute(sql.delete(table))
+        await session.commit()
+        await session.rollback()
+        for table in self.tables.values():
+            await session.execute(sql.delete(table))
+        await session.rollback()
+        await session.close()
+        for engine in engines.values():
+            self.assertEqual(engine.log, [
+                'execute', 'begin', 'execute', 'commit',
+                'begin', 'execute', 'rollback', 'release',
+            ])
+
+    @asynctest
+    async def test_close_rollback_error(self):
+        engines = {
+            'admin': _Engine('admin', rollback_fail=True),
+            'front': _Engine('front', rollback_delay=0.01),
+        }
+        session = self.create_session(engines)
+        for table in self.tables.values():
+            await session.execute(sql.delete(table))
+        with self.assertRaises(RuntimeError):
+            await session.close()
+        self.assertEqual(engines['admin'].log, ['begin', 'execute', 'release'])
+        # released only after its rollback finished
+        self.assertEqual(
+            engines['front'].log, ['begin', 'execute', 'rollback', 'release'])
+
+    @asynctest
+    async def test_readonly(self):
+        engines = {'admin': _Engine('admin')}
+        session = self.create_session(engines, readonly=True)
+        table = self.tables['admin']
+        await session.execute(sql.select([table.c.id]))
+        with self.assertRaises(exc.OrmError):
+            await session.execute(sql.delete(table))
+        await session.close()
+        self.assertEqual(engines['admin'].log, ['execute', 'release'])
+
+    @asynctest
+    async def test_commit_hooks(self):
+        calls = []
+        async def hook(session, tables):
+            calls.append(tables)
+        async def failing_hook(session, tables):
+            raise Exception('hook error')
+        engines = {'admin': _Engine('admin'), 'front': _Engine('front')}
+        session = self.create_session(
+            engines, commit_hooks=[failing_hook, hook])
+        table = self.tables['admin']
+        async with session:
+            await session.execute(sql.select([table.c.id]))
+        self.assertEqual(calls, [])
+        async with session:
+            await session.execute(sql.delete(table))
+        await session.execute(sql.delete(self.tables['front']))
+        await session.rollback()
+        await session.commit()
+        self.assertEqual(calls, [{table}])
+
+
+class SessionReplicaTestCase(TestCase):
+
+    def setUp(self):
+        self.table = sa.Table(
+            'Test',
+            sa.MetaData(),
+            sa.Column('id', sa.Integer, primary_key=True),
+        )
+        self.primary = _Engine('primary')
+        self.replicas = [_Engine('replica1'), _Engine('replica2')]
+        self.pool = ReplicaPool(self.replicas)
+
+    def create_session(self):
+        return Session(
+            {'db': self.primary},
+            {self.table: self.primary},
+            replicas={self.table: self.pool},
+        )
+
+    def test_round_robin(self):
+        self.assertEqual(
+            [self.pool.choose() for i in range(3)],
+            [self.replicas[0], self.replicas[1], self.replicas[0]],
+        )
+
+    @asynctest
+    async def test_read_routing(self):
+        select = sql.select([self.table.c.id])
+        session = self.create_session()
+        self.assertIs(session.get_read_engine(select), self.replicas[0])
+        self.assertIs(
+            session.get_read_engine(select.with_for_update()), self.primary)
+        await session.execute(select)
+        await session.execute(select)
+        self.assertEqual(self.replicas[0].log, ['execute', 'execute'])
+
+        await session.execute(sql.delete(self.table))
+        await session.execute(select)
+        self.assertEqual(self.primary.log, ['begin', 'execute', 'execute'])
+        await session.close()
+
+        session = self.create_session()
+        self.assertIs(session.get_read_engine(select), self.replicas[1])
+
+
+class SessionReadBeforeWriteTestCase(TestCase):
+
+    class MapperClass(orm.mappers.Base):
+
+        name = 'Test'
+
+        def create_relations(self):
+            return {'tags': relations.M2M(self, 'Tag')}
+
+    class TagMapperClass(orm.mappers.Base):
+
+        name = 'Tag'
+
+    def setUp(self):
+        registry = orm.mappers.Registry.from_db_ids(['db'])
+        self.MapperClass.create(registry, db_id='db')
+        self.TagMapperClass.create(registry, db_id='db')
+        registry.create_schema()
+        self.mapper = registry['db']['Test']
+        self.tables = registry.metadata['db'].tables.values()
+
+    def create_session(self, primary, replica):
+        pool = ReplicaPool([replica])
+        return Session(
+            {'db': primary},
+            {table: primary for table in self.tables},
+            replicas={table: pool for table in self.tables},
+        )
+
+    @asynctest
+    async def test_update_relations(self):
+        relation = self.mapper.relations['tags']
+        item_row = {self.mapper.c['id']: 1}
+        # the replica lags behind and misses the second link
+        primary = _Engine('primary', results=[
+            [item_row],
+            [{relation.remote_field: 1}, {relation.remote_field: 2}],
+        ])
+        replica = _Engine('replica', results=[
+            [item_row],
+            [{relation.remote_field: 1}],
+        ])
+        session = self.create_session(primary, replica)
+        await self.mapper.update_item(
+            session, self.mapper.query(), 1, {'tags': [1, 2]})
+        self.assertEqual(replica.log, [])
+        # exists check and links select, links are up to date
+        self.assertEqual(primary.log, ['begin', 'execute', 'execute'])
+        self.assertEqual(session.written_tables, set())
+        await session.close()
+
+    @asynctest
+    async def test_delete_item(self):
+        primary = _Engine('primary', results=[[]])
+        replica = _Engine('replica', results=[[{self.mapper.c['id']: 1}]])
+        session = self.create_session(primary, replica)
+        with self.assertRaises(exc.ItemNotFoundError):
+            await self.mapper.delete_item(session, self.mapper.query(), 1)
+        self.assertEqual(replica.log, [])
+        await session.close()
+
+
+class SessionPublicationTestCase(TestCase):
+
+    class MapperClass(orm.mappers.Pub):
+
+        name = 'Test'
+
+        def create_columns(self):
+            return [sa.Column('title', sa.String(255))]
+
+    def setUp(self):
+        registry = orm.mappers.Registry.from_db_ids(['admin', 'front'])
+        self.MapperClass.create(registry)
+        registry.create_schema()
+        self.mapper = registry['admin']['Test']
+        self.tables = [table for metadata in registry.metadata.values() \
+                       for table in metadata.tables.values()]
+
+    def create_session(self, primary, replica):
+        pool = ReplicaPool([replica])
+        return Session(
+            {'admin': primary, 'front': primary},
+            {table: primary for table in self.tables},
+            replicas={table: pool for table in self.tables},
+        )
+
+    @asynctest
+    async def test_publish_items(self):
+        row = {'id': 1, 'title': 'edited', 'state': 'private'}
+        # the replica lags behind and misses the admin edit and a new item
+        primary = _Engine('primary', results=[[row, dict(row, id=2)]])
+        replica = _Engine('replica', results=[[dict(row, title='old')]])
+        session = self.create_session(primary, replica)
+        ids = await self.mapper.query().publish_items(session, [1, 2])
+        self.assertEqual(ids, [1, 2])
+        self.assertEqual(replica.log, [])
+        # locking select, admin state update, front items update
+        self.assertEqual(
+            primary.log, ['begin', 'execute', 'execute', 'execute'])
+        await session.close()
+
+    @asynctest
+    async def test_unpublish_items(self):
+        id_column = self.mapper.c['id']
+        primary = _Engine('primary', results=[[{id_column: 1}]])
+        replica = _Engine('replica', results=[[]])
+        session = self.create_session(primary, replica)
+        ids = await self.mapper.query().unpublish_items(session, [1])
+        self.assertEqual(ids, [1])
+        self.assertEqual(replica.log, [])
+        await session.close()
+
+
+class SessionStatsTestCase(TestCase):
+
+    @asynctest
+    async def test_stats(self):
+        table = sa.Table(
+            'Test',
+            sa.MetaData(),
+            sa.Column('id', sa.Integer, primary_key=True),
+        )
+        engine = _Engine('db')
+        records = []
+        instrumentation = Instrumentation(
+            slow_query_time=None,
+            repeat_limit=2,
+            hooks=[records.append],
+        )
+        with request_stats('stream.list') as stats:
+            session = Session(
+                {'db': engine},
+                {table: engine},
+                instrumentation=instrumentation,
+            )
+            with self.assertLogs('ikcms.orm.instrumentation') as logs:
+                for i in range(3):
+                    await session.execute(
+                        sql.select([table.c.id]).where(table.c.id == i))
+            await session.execute(sql.delete(table))
+            await session.close()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('N+1', logs.output[0])
+        self.assertEqual(
+            [(record.kind, record.table, record.action) \
+             for record in records],
+            [('select', 'Test', 'stream.list')] * 3 + \
+                [('delete', 'Test', 'stream.list')],
+        )
+        self.assertEqual(stats.sessions, [session.stats])
+        self.assertEqual(stats.totals()['queries'], 4)
+        self.assertEqual(stats.totals()['rows'], 4)
+
+
 @skipIf(mysql_skip, 'Aiomysql not installed')
 class MysqlSessionTestCase(_SessionTestCaseBase):
     db_url = cfg.MYSQL_URL
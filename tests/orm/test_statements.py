@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.mysql.pymysql import MySQLDialect_pymysql
+
+from ikcms.orm.statements import StatementCache
+
+
+class StatementCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.dialect = MySQLDialect_pymysql(paramstyle='pyformat')
+        self.table = sa.Table(
+            'Test',
+            sa.MetaData(),
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('title', sa.String(255)),
+        )
+
+    def test_get_statement(self):
+        cache = StatementCache()
+        factory = lambda: sa.sql.delete(self.table)
+        statement = cache.get_statement(('delete',), factory)
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 1, 'size': 1})
+        self.assertIs(cache.get_statement(('delete',), factory), statement)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+        self.assertIs(
+            statement.compile(self.dialect),
+            statement.compile(self.dialect),
+        )
+
+    def test_render_expanding(self):
+        cache = StatementCache()
+        statement = cache.get_statement(
+            ('load',),
+            lambda: sa.sql.select([self.table.c.id]).where(
+                self.table.c.id.in_(sa.bindparam('ids', expanding=True))),
+        )
+        compiled = statement.compile(self.dialect)
+        sql, params = compiled.render({'ids': [3, 1]})
+        self.assertIn('IN (%(ids_1)s, %(ids_2)s)', sql)
+        self.assertEqual(params, {'ids_1': 3, 'ids_2': 1})
+        sql, params = compiled.render({'ids': [5]})
+        self.assertIn('IN (%(ids_1)s)', sql)
+        self.assertEqual(params, {'ids_1': 5})
+
+    def test_render_column_keys(self):
+        cache = StatementCache()
+        statement = cache.get_statement(
+            ('update', frozenset(['title'])),
+            lambda: sa.sql.update(self.table).where(
+                self.table.c.id == sa.bindparam('_item_id')),
+            column_keys=['title'],
+        )
+        sql, params = statement.compile(self.dialect).render(
+            {'title': 'title1', '_item_id': 2})
+        self.assertEqual(
+            sql,
+            'UPDATE `Test` SET title=%(title)s '
+            'WHERE `Test`.id = %(_item_id)s',
+        )
+        self.assertEqual(params, {'title': 'title1', '_item_id': 2})
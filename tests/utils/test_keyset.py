@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+import sqlalchemy as sa
+
+from ikcms.utils import keyset
+
+
+class SeekClauseTestCase(TestCase):
+
+    ranks = [None, 1, 1, 2, None, 3, 2, None, 1]
+
+    def setUp(self):
+        # sqlite sorts NULLs first in ascending order, as MySQL does
+        self.engine = sa.create_engine('sqlite://')
+        metadata = sa.MetaData()
+        self.table = sa.Table(
+            'Test',
+            metadata,
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('rank', sa.Integer, nullable=True),
+        )
+        metadata.create_all(self.engine)
+        self.engine.execute(self.table.insert(), [
+            {'id': num + 1, 'rank': rank} \
+            for num, rank in enumerate(self.ranks)
+        ])
+
+    def select(self, keys, values=None, reverse=False, limit=None):
+        query = sa.sql.select([self.table.c.id, self.table.c.rank]) \
+            .order_by(*keyset.order_clauses(keys, reverse=reverse)) \
+            .limit(limit)
+        if values is not None:
+            query = query.where(
+                keyset.seek_clause(keys, values, reverse=reverse))
+        return [tuple(row) for row in self.engine.execute(query)]
+
+    def assert_pages(self, keys):
+        expected = self.select(keys)
+        # forward pages
+        rows = []
+        values = None
+        while True:
+            page = self.select(keys, values, limit=2)
+            if not page:
+                break
+            rows += page
+            values = [page[-1][1], page[-1][0]]
+        self.assertEqual(rows, expected)
+        # backward pages from the last row
+        rows = [expected[-1]]
+        values = [expected[-1][1], expected[-1][0]]
+        while True:
+            page = self.select(keys, values, reverse=True, limit=2)
+            if not page:
+                break
+            rows = list(reversed(page)) + rows
+            values = [page[-1][1], page[-1][0]]
+        self.assertEqual(rows, expected)
+
+    def test_asc(self):
+        self.assert_pages([(self.table.c.rank, False), (self.table.c.id, False)])
+
+    def test_desc(self):
+        self.assert_pages([(self.table.c.rank, True), (self.table.c.id, False)])
+
+    def test_not_nullable(self):
+        keys = [(self.table.c.id, True)]
+        self.assertEqual(
+            str(keyset.seek_clause(keys, [3])), '"Test".id < :id_1')
+        self.assertEqual(
+            [row[0] for row in self.select(keys, [3])], [2, 1])
@@ -0,0 +1,101 @@
+from unittest import TestCase
+
+import sqlalchemy as sa
+from sqlalchemy import orm
+from sqlalchemy.ext.declarative import declarative_base
+
+from ikcms.utils.paginator import Paginator
+from ikcms.utils.paginator import PageNotFound
+
+
+Base = declarative_base()
+
+
+class Item(Base):
+
+    __tablename__ = 'Item'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    rank = sa.Column(sa.Integer, nullable=False)
+
+
+class CursorPageTestCase(TestCase):
+
+    ranks = [3, 1, 2, 1, 3, 2, 1]
+
+    def setUp(self):
+        engine = sa.create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.statements = []
+        sa.event.listen(
+            engine,
+            'before_cursor_execute',
+            lambda conn, cursor, statement, *args: \
+                self.statements.append(statement),
+        )
+        self.db = orm.sessionmaker(bind=engine)()
+        self.db.add_all([Item(id=num + 1, rank=rank) \
+                         for num, rank in enumerate(self.ranks)])
+        self.db.commit()
+        self.paginator = Paginator(
+            self.db.query(Item).order_by(Item.rank), limit=3)
+        # ties of rank go by id
+        self.ids = [2, 4, 7, 3, 6, 1, 5]
+
+    def ids_of(self, page):
+        return [item.id for item in page]
+
+    def test_first_page(self):
+        page = self.paginator.cursor_page()
+        self.assertEqual(self.ids_of(page), self.ids[:3])
+        self.assertFalse(page.has_prev)
+        self.assertTrue(page.has_next)
+        self.assertIsNone(page.prev_cursor)
+        self.assertIsNotNone(page.next_cursor)
+        self.assertIsNone(page.prev_page)
+
+    def test_after(self):
+        page = self.paginator.cursor_page()
+        pages = [self.ids_of(page)]
+        while page.has_next:
+            page = page.next_page
+            pages.append(self.ids_of(page))
+        self.assertEqual(pages, [self.ids[:3], self.ids[3:6], self.ids[6:]])
+        self.assertTrue(page.has_prev)
+        self.assertIsNone(page.next_cursor)
+
+    def test_before(self):
+        page = self.paginator.cursor_page()
+        last = page.next_page.next_page
+        page = last.prev_page
+        self.assertEqual(self.ids_of(page), self.ids[3:6])
+        self.assertTrue(page.has_prev)
+        # the page before is followed by the page it was built from
+        self.assertTrue(page.has_next)
+        page = page.prev_page
+        self.assertEqual(self.ids_of(page), self.ids[:3])
+        self.assertFalse(page.has_prev)
+        self.assertEqual(self.ids_of(page.next_page), self.ids[3:6])
+
+    def test_empty_page(self):
+        paginator = Paginator(
+            self.db.query(Item).filter(Item.rank > 3).order_by(Item.rank),
+            limit=3,
+        )
+        page = paginator.cursor_page()
+        self.assertEqual(page.items, [])
+        self.assertFalse(page.has_prev)
+        self.assertFalse(page.has_next)
+        self.assertIsNone(page.next_cursor)
+        self.assertIsNone(page.next_page)
+        with self.assertRaises(PageNotFound):
+            self.paginator.cursor_page(after='broken')
+
+    def test_lazy_count(self):
+        page = self.paginator.cursor_page()
+        page.next_page
+        self.assertFalse([statement for statement in self.statements \
+                          if 'count(' in statement.lower()])
+        self.assertEqual(self.paginator.count, len(self.ranks))
+        self.assertTrue([statement for statement in self.statements \
+                         if 'count(' in statement.lower()])
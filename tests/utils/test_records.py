@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from ikcms.utils.records import record_class
+
+
+class RecordTestCase(TestCase):
+
+    def test_mapping(self):
+        Record = record_class('TestRecord', ('id', 'title', 'date'))
+        record = Record(1, 'first')
+        self.assertEqual(record['title'], 'first')
+        self.assertEqual(record.get('date', 'default'), 'default')
+        self.assertEqual(record.get('unknown'), None)
+        self.assertNotIn('date', record)
+        with self.assertRaises(KeyError):
+            record['date']
+        with self.assertRaises(KeyError):
+            record['unknown']
+        self.assertEqual(record.keys(), ['id', 'title'])
+        self.assertEqual(record.values(), [1, 'first'])
+        self.assertEqual(len(record), 2)
+
+        record['date'] = None
+        self.assertEqual(record.to_dict(),
+                         {'id': 1, 'title': 'first', 'date': None})
+        with self.assertRaises(KeyError):
+            record['unknown'] = 1
+        with self.assertRaises(TypeError):
+            Record(1, 'first', None, 'extra')
+
+    def test_from_mapping(self):
+        Record = record_class('TestRecord', ('id', 'title', 'date'))
+        record = Record.from_mapping({'id': 1, 'date': None, 'other': 2})
+        self.assertEqual(record, {'id': 1, 'date': None})
+
+    def test_field_names(self):
+        # keywords and names of the mapping methods are valid columns
+        fields = ('id', 'from', 'class', 'keys', 'items', 'values', 'get')
+        Record = record_class('TestRecord', fields)
+        record = Record(*range(len(fields)))
+        self.assertEqual(record.keys(), list(fields))
+        self.assertEqual(record['from'], 1)
+        self.assertEqual(record['get'], 6)
+        self.assertEqual(record.get('keys'), 3)
+        with self.assertRaises(ValueError):
+            record_class('TestRecord', ('id', 'id'))
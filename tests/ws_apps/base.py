@@ -1,12 +1,23 @@
+import asyncio
 import json
+from datetime import date
+from datetime import datetime
 from unittest import TestCase
+from unittest import skipIf
 from unittest.mock import MagicMock
 
 from ikcms.utils.asynctests import asynctest
 
 from ikcms.ws_apps.base import App
+from ikcms.ws_apps.base import protocols
 from ikcms.ws_apps.base import exceptions
 from ikcms.ws_apps.base.client import Client
+from ikcms.ws_servers.base import ServerBase
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 
 class SendException(Exception):
@@ -43,6 +54,33 @@ class ServerMock:
         self.sends.append(json.loads(json_data))
 
 
+class BroadcastServerMock(ServerBase):
+
+    def __init__(self, subprotocols=None, gone=()):
+        self.subprotocols = subprotocols or {}
+        self.gone = gone
+        self.sends = []
+
+    def get_subprotocol(self, client_id):
+        return self.subprotocols.get(client_id)
+
+    async def send(self, client_id, data):
+        if client_id in self.gone:
+            raise SendException
+        self.sends.append((client_id, data))
+
+
+class CountingJson(protocols.Json):
+
+    def __init__(self, name='json'):
+        self.name = name
+        self.encoded = 0
+
+    def encode(self, python_data):
+        self.encoded += 1
+        return super().encode(python_data)
+
+
 class ClientMock(dict):
 
     def __init__(self, app, server, client_id):
@@ -329,6 +367,70 @@ class AppTestCase(TestCase):
                 list(s['body']['kwargs']['errors']), ['handler'],
             )
 
+    @asynctest
+    async def test_call_concurrent(self):
+        delays = {'slow1': 0.03, 'slow2': 0.02, 'fast': 0}
+        async def handle(client, request):
+            await asyncio.sleep(delays[request['request_id']])
+            return {
+                'name': 'response',
+                'request_id': request['request_id'],
+                'handler': request['handler'],
+                'body': {},
+            }
+        def create_request(request_id, handler):
+            return {
+                'name': 'request',
+                'request_id': request_id,
+                'handler': handler,
+                'body': {},
+            }
+        class ConcurrentAppMock(self.AppMock):
+            max_in_flight = 3
+            ordered_handlers = frozenset(['ordered'])
+        requests = [
+            create_request('slow1', 'test_handler'),
+            create_request('slow2', 'test_handler'),
+            create_request('fast', 'test_handler'),
+        ]
+        app_mock = ConcurrentAppMock(handle=handle)
+        server = ServerMock(list(reversed(requests)))
+        await App.__call__(app_mock, server, 'client1')
+        self.assertEqual([send['request_id'] for send in server.sends],
+                         ['fast', 'slow2', 'slow1'])
+        self.assert_connection_error(app_mock, server, RecvException)
+
+        # ordered handler
+        requests = [
+            create_request('slow1', 'ordered'),
+            create_request('slow2', 'test_handler'),
+            create_request('fast', 'ordered'),
+        ]
+        app_mock = ConcurrentAppMock(handle=handle)
+        server = ServerMock(list(reversed(requests)))
+        await App.__call__(app_mock, server, 'client1')
+        self.assertEqual([send['request_id'] for send in server.sends],
+                         ['slow2', 'slow1', 'fast'])
+
+        # max in flight
+        in_flight = []
+        peak = []
+        async def handle(client, request):
+            in_flight.append(request['request_id'])
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(request['request_id'])
+            return dict(create_request(request['request_id'], 'test_handler'),
+                        name='response')
+        app_mock = ConcurrentAppMock(handle=handle, max_in_flight=2)
+        requests = [create_request(str(num), 'test_handler') \
+                    for num in range(5)]
+        server = ServerMock(requests)
+        await App.__call__(app_mock, server, 'client1')
+        self.assertEqual(len(server.sends), 5)
+        self.assertEqual(max(peak), 2)
+        self.assert_connection_error(app_mock, server, RecvException)
+
     @asynctest
     async def test_handle(self):
         app = self.get_app()
@@ -365,6 +467,114 @@ class AppTestCase(TestCase):
         self.assertEqual(exc.error, 'HandlerNotAllowedError')
         self.assertEqual(exc.kwargs, {'handler': 'error_handler'})
 
+    @skipIf(msgpack is None, 'msgpack is not installed')
+    def test_msgpack_protocol(self):
+        class MsgPackApp(self.App):
+            subprotocols = (protocols.MsgPack(),)
+        app = self.get_app(App=MsgPackApp)
+        self.assertEqual(app.subprotocol_names, ['msgpack'])
+        self.assertIs(app.get_protocol('msgpack'), app.subprotocols[0])
+        self.assertIs(app.get_protocol(None), app.protocol)
+        self.assertIs(app.get_protocol('unknown'), app.protocol)
+
+        client = MagicMock(protocol=app.subprotocols[0])
+        body = {
+            'date': date(2020, 1, 17),
+            'datetime': datetime(2020, 1, 17, 10, 30),
+            'bytes': b'\x00\xff',
+            'items': [{'id': 1, 'title': 'title'}],
+        }
+        raw_response = app.encode_response(app.protocol.ResponseMessage(
+            name='response',
+            request_id='test_id',
+            handler='test_handler',
+            body=body,
+        ), client)
+        self.assertIsInstance(raw_response, bytes)
+        response = app.subprotocols[0].decode(raw_response)
+        self.assertEqual(response['body'], body)
+
+        raw_request = msgpack.packb({
+            'name': 'request',
+            'request_id': 'test_id',
+            'handler': 'test_handler',
+            'body': {},
+        })
+        request = app.decode_request(raw_request, client)
+        self.assertEqual(request['handler'], 'test_handler')
+        for raw_request in [b'\xc1', msgpack.packb([1]), 'text']:
+            with self.assertRaises(exceptions.ClientError):
+                app.decode_request(raw_request, client)
+
+    @asynctest
+    async def test_broadcast(self):
+        class BroadcastApp(self.App):
+            protocol = CountingJson()
+            subprotocols = (CountingJson('json2'),)
+        app = self.get_app(App=BroadcastApp)
+        server = BroadcastServerMock(
+            subprotocols={'client2': 'json2', 'client4': 'json2'},
+            gone=['client3'],
+        )
+        for client_id in ['client1', 'client2', 'client3', 'client4']:
+            await app.add_client(server, client_id)
+        message = app.notification('test_handler', {'test': 1})
+        self.assertEqual(await app.broadcast(message), 3)
+        # encoded once per protocol
+        self.assertEqual(app.protocol.encoded, 1)
+        self.assertEqual(app.subprotocols[0].encoded, 1)
+        self.assertEqual(
+            sorted(client_id for client_id, data in server.sends),
+            ['client1', 'client2', 'client4'],
+        )
+        for client_id, data in server.sends:
+            self.assertEqual(json.loads(data), {
+                'name': 'notification',
+                'handler': 'test_handler',
+                'body': {'test': 1},
+            })
+
+        server.sends = []
+        clients = [app.clients['client1'], app.clients['client3']]
+        self.assertEqual(await app.broadcast(message, clients), 1)
+        self.assertEqual([client_id for client_id, data in server.sends],
+                         ['client1'])
+
+    def test_trusted_messages(self):
+        app = self.get_app()
+        response = app.protocol.ResponseMessage.trusted(
+            name='response',
+            request_id='test_id',
+            handler='test_handler',
+            body={'test': 1},
+        )
+        self.assertIsInstance(response, app.protocol.ResponseMessage)
+        self.assertEqual(
+            json.loads(app.encode_response(response)),
+            {
+                'name': 'response',
+                'request_id': 'test_id',
+                'handler': 'test_handler',
+                'body': {'test': 1},
+            },
+        )
+        self.assertIs(app.protocol.RequestMessage.get_form(),
+                      app.protocol.RequestMessage.get_form())
+        self.assertIsNot(app.protocol.RequestMessage.get_form(),
+                         app.protocol.ErrorMessage.get_form())
+
+        request = app.decode_request(json.dumps({
+            'name': 'request',
+            'request_id': 'test_id',
+            'handler': 'test_handler',
+            'body': {'test': 1},
+        }))
+        self.assertIsInstance(request, app.protocol.RequestMessage)
+        self.assertEqual(request['body'], {'test': 1})
+        with self.assertRaises(exceptions.ClientError) as ctx:
+            app.decode_request(json.dumps({'name': 'response', 'body': {}}))
+        self.assertEqual(list(ctx.exception.kwargs['errors']), ['name'])
+
     def assert_connection_error(self, app_mock, server, exc_class):
         self.assertEqual(
             app_mock.log,
@@ -46,6 +46,20 @@ class AIOMCacheTestCase(TestCase):
         value = await cache.get(b'test_prefix-test_key')
         self.assertIsNone(value)
 
+    @asynctest
+    async def test_add(self):
+        app = self._create_app()
+
+        cache = await component().create(app)
+        await cache.delete(b'test_key')
+
+        self.assertTrue(await cache.add(b'test_key', b'test_value'))
+        self.assertFalse(await cache.add(b'test_key', b'other_value'))
+        value = await cache.get(b'test_key')
+        self.assertEqual(value, b'test_value')
+
+        await cache.delete(b'test_key')
+
     def _create_app(self):
         app = MagicMock()
         del app.cache
@@ -32,6 +32,35 @@ class AIORedisTestCase(TestCase):
         value = await cache.get(b'test_key')
         self.assertIsNone(value)
 
+    @asynctest
+    async def test_add(self):
+        app = self._create_app()
+
+        cache = await component().create(app)
+        await cache.delete(b'test_key')
+
+        self.assertTrue(await cache.add(b'test_key', b'test_value'))
+        self.assertFalse(await cache.add(b'test_key', b'other_value'))
+        value = await cache.get(b'test_key')
+        self.assertEqual(value, b'test_value')
+
+        await cache.delete(b'test_key')
+
+    @asynctest
+    async def test_delete_if_equal(self):
+        app = self._create_app()
+
+        cache = await component().create(app)
+        await cache.set(b'test_key', b'test_value')
+
+        self.assertFalse(await cache.delete_if_equal(b'test_key', b'other'))
+        self.assertEqual(await cache.get(b'test_key'), b'test_value')
+        self.assertTrue(
+            await cache.delete_if_equal(b'test_key', b'test_value'))
+        self.assertIsNone(await cache.get(b'test_key'))
+        self.assertFalse(
+            await cache.delete_if_equal(b'test_key', b'test_value'))
+
     def _create_app(self):
         app = MagicMock()
         del app.cache
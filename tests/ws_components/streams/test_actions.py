@@ -304,6 +304,7 @@ class ActionsTestCase(TestCase):
                         self.assertEqual(resp['page'], _page)
                         self.assertEqual(resp['order'], _order)
                         self.assertEqual(resp['total'], len(_raw_items))
+                        self.assertEqual(resp['total_kind'], 'exact')
 
 
         error_page_values = [-10, 0, 5.6, 'aaaa', '20', None]
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import sqlalchemy as sa
+
+from ikcms import orm
+from ikcms.utils.asynctests import asynctest
+from ikcms.ws_components.streams import component
+from ikcms.ws_components.streams.streams import Stream
+from ikcms.ws_components.streams.forms import list_fields
+
+
+class DictCache:
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, expire=0):
+        self.values[key] = value
+
+
+class EmptySession:
+
+    identity_map = None
+
+    async def execute(self, query, params=None):
+        return []
+
+
+class CachedCountTestCase(TestCase):
+
+    class MapperClass(orm.mappers.Base):
+
+        name = 'Test'
+
+        def create_columns(self):
+            return [sa.Column('title', sa.String(255))]
+
+    class TestStream(Stream):
+        name = 'test_stream'
+        mapper_name = 'Test'
+        db_id = 'db1'
+        count_strategy = 'cached'
+        list_fields = [list_fields.id]
+
+        async def count_total(self, env, session, query):
+            # a write to the table commits while the rows are counted
+            await self.component.on_db_commit(session, {self.mapper.table})
+            return 5, 'exact'
+
+    def create_streams(self):
+        registry = orm.mappers.Registry.from_db_ids(['db1', 'db2'])
+        self.MapperClass.create(registry, db_id='db1')
+        self.MapperClass.create(registry, db_id='db2')
+        registry.create_schema()
+        app = SimpleNamespace(
+            handlers={},
+            cache=DictCache(),
+            db=SimpleNamespace(mappers=registry),
+        )
+        streams = component(streams=[self.TestStream])(app)
+        return streams, streams.streams['test_stream']
+
+    @asynctest
+    async def test_on_db_commit(self):
+        streams, stream = self.create_streams()
+        env = MagicMock()
+        key = await stream.get_total_cache_key(env, {'title': 'a'})
+        self.assertNotEqual(key, await stream.get_total_cache_key(env))
+        await stream.set_cached_total(env, key, 10)
+        self.assertEqual(await stream.get_cached_total(env, key), 10)
+
+        # writes to other tables keep cached totals
+        other_table = streams.app.db.mappers['db2']['Test'].table
+        await streams.on_db_commit(EmptySession(), {other_table})
+        self.assertEqual(
+            await stream.get_total_cache_key(env, {'title': 'a'}), key)
+
+        await streams.on_db_commit(EmptySession(), {stream.mapper.table})
+        new_key = await stream.get_total_cache_key(env, {'title': 'a'})
+        self.assertNotEqual(new_key, key)
+        self.assertIsNone(await stream.get_cached_total(env, new_key))
+
+    @asynctest
+    async def test_write_during_count(self):
+        streams, stream = self.create_streams()
+        env = MagicMock()
+        key = await stream.get_total_cache_key(env)
+        items, total, total_kind, has_prev, has_next = \
+            await stream.list_items_with_total(
+                env, EmptySession(), page=1, page_size=10)
+        self.assertEqual((items, total, total_kind), ([], 5, 'exact'))
+        self.assertEqual((has_prev, has_next), (False, False))
+        # the total counted before the write is not served as current
+        new_key = await stream.get_total_cache_key(env)
+        self.assertNotEqual(new_key, key)
+        self.assertIsNone(await stream.get_cached_total(env, new_key))
+        self.assertEqual(await stream.get_cached_total(env, key), 5)
@@ -0,0 +1,132 @@
+from unittest import TestCase
+from unittest import skipIf
+from unittest.mock import MagicMock
+
+from ikcms.utils.asynctests import asynctest
+from ikcms.ws_components.locks import component
+from ikcms.ws_components.locks import backends
+
+from tests.cfg import cfg
+
+if cfg.AIOREDIS_ENABLED:
+    from ikcms.ws_components.cache.aioredis import component as redis
+
+
+class DictCache:
+
+    compare_and_delete = True
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, expire=0):
+        self.values[key] = value
+
+    async def add(self, key, value, expire=0):
+        return self.values.setdefault(key, value) is value
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+    async def delete_if_equal(self, key, value):
+        if self.values.get(key) != value:
+            return False
+        del self.values[key]
+        return True
+
+
+class LocksTestCase(TestCase):
+
+    backend_class = backends.MemoryBackend
+
+    @asynctest
+    async def test_locks(self):
+        app = await self._create_app()
+        locks = await component(backend_class=self.backend_class).create(app)
+        env1 = MagicMock(session_id='session1')
+        env2 = MagicMock(session_id='session2')
+        await locks.backend.release('test.lock', 'session1')
+        await locks.backend.release('test.lock', 'session2')
+
+        self.assertTrue(await locks.acquire(env1, 'test.lock'))
+        self.assertTrue(await locks.acquire(env1, 'test.lock'))
+        self.assertFalse(await locks.acquire(env2, 'test.lock'))
+        self.assertFalse(await locks.release(env2, 'test.lock'))
+        self.assertEqual(await locks.backend.owner('test.lock'), 'session1')
+
+        await locks.take(env2, 'test.lock')
+        self.assertEqual(await locks.backend.owner('test.lock'), 'session2')
+        self.assertFalse(await locks.acquire(env1, 'test.lock'))
+
+        # closed client releases only locks its session owns
+        await locks.client_close(env1)
+        self.assertEqual(await locks.backend.owner('test.lock'), 'session2')
+        self.assertEqual(locks.get_locks_by_session_id('session2'),
+                         ['test.lock'])
+        await locks.client_close(env2)
+        self.assertIsNone(await locks.backend.owner('test.lock'))
+        self.assertEqual(locks.get_locks_by_session_id('session2'), [])
+
+        self.assertTrue(await locks.acquire(env1, 'test.lock'))
+        self.assertTrue(await locks.release(env1, 'test.lock'))
+        self.assertTrue(await locks.release(env1, 'test.lock'))
+        self.assertIsNone(await locks.backend.owner('test.lock'))
+
+    def test_backend_cfg(self):
+        app = MagicMock(handlers={})
+        del app.locks
+        app.cfg = MagicMock(LOCKS_BACKEND='cache', WS_WORKERS=4)
+        locks = component()(app)
+        self.assertIsInstance(locks.backend, backends.CacheBackend)
+
+        app.cfg = MagicMock(LOCKS_BACKEND='memory', WS_WORKERS=4)
+        del app.locks
+        # every worker would grant the same lock
+        with self.assertRaises(AssertionError):
+            component()(app)
+
+    def test_cache_check(self):
+        app = MagicMock(handlers={})
+        del app.locks
+        app.cfg = MagicMock(LOCKS_BACKEND='cache', WS_WORKERS=4)
+        app.cache = DictCache()
+        component()(app).app_init()
+
+        # owner can not be compared and deleted in one step
+        del app.locks
+        app.cache.compare_and_delete = False
+        locks = component()(app)
+        with self.assertRaises(AssertionError):
+            locks.app_init()
+
+    async def _create_app(self):
+        app = MagicMock()
+        del app.locks
+        app.cfg = cfg
+        app.handlers = {}
+        return app
+
+
+class DictCacheLocksTestCase(LocksTestCase):
+
+    backend_class = backends.CacheBackend
+
+    async def _create_app(self):
+        app = await super()._create_app()
+        app.cache = DictCache()
+        return app
+
+
+@skipIf(not cfg.AIOREDIS_ENABLED, 'Aioredis DISABLED')
+class CacheLocksTestCase(LocksTestCase):
+
+    backend_class = backends.CacheBackend
+
+    async def _create_app(self):
+        app = await super()._create_app()
+        del app.cache
+        await redis().create(app)
+        return app
@@ -0,0 +1,51 @@
+import asyncio
+from unittest import TestCase
+
+from ikcms.utils.asynctests import asynctest
+from ikcms.ws_servers.queues import SendQueue
+
+
+class SendQueueTestCase(TestCase):
+
+    @asynctest
+    async def test_queue(self):
+        queue = SendQueue(3)
+        queue.put(b'1')
+        queue.put(b'2', key='counter')
+        self.assertFalse(queue.full())
+        self.assertTrue(queue.replace(b'3', key='counter'))
+        self.assertFalse(queue.replace(b'4', key='other'))
+        queue.put(b'4', key='other')
+        self.assertTrue(queue.full())
+        self.assertEqual(len(queue), 3)
+
+        self.assertEqual(await queue.get(), b'1')
+        self.assertEqual(await queue.get(), b'3')
+        # sent messages are not coalesced
+        self.assertFalse(queue.replace(b'5', key='counter'))
+        self.assertEqual(await queue.get(), b'4')
+        self.assertEqual(len(queue), 0)
+
+    @asynctest
+    async def test_get_waits(self):
+        queue = SendQueue(3)
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        self.assertFalse(getter.done())
+        queue.put(b'1')
+        self.assertEqual(await asyncio.wait_for(getter, 1), b'1')
+
+    @asynctest
+    async def test_close(self):
+        queue = SendQueue(3)
+        queue.put(b'1')
+        queue.close()
+        # queued messages are still sent
+        self.assertEqual(await queue.get(), b'1')
+        self.assertIsNone(await queue.get())
+
+        queue = SendQueue(3)
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        queue.close()
+        self.assertIsNone(await asyncio.wait_for(getter, 1))